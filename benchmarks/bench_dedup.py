@@ -0,0 +1,65 @@
+import random
+import string
+import time
+
+from benchmarks.synthetic import INGREDIENTS, ORIGINS
+from dedup import NearDuplicateIndex
+from records import RecipeRecord
+
+SIZE = 100_000
+# one in every DUPLICATE_EVERY recipes gets a lightly edited copy
+DUPLICATE_EVERY = 50
+VOCABULARY_SIZE = 20_000
+
+
+def make_varied_records(count, seed=0):
+    # make_records draws from a couple dozen words, far too few for
+    # recipes to look distinct to MinHash, so use a larger vocabulary here
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(VOCABULARY_SIZE)]
+    for recipe_id in range(1, count + 1):
+        yield RecipeRecord(
+            recipe_id,
+            " ".join(rng.choices(vocabulary, k=3)).title(),
+            str(rng.randint(5, 240)),
+            rng.choice(ORIGINS),
+            " ".join(rng.choices(vocabulary, k=20)),
+            ingredients=rng.sample(INGREDIENTS, rng.randint(1, 5)),
+        )
+
+
+def near_copy(record, recipe_id, rng):
+    words = record.description.split()
+    words[rng.randrange(len(words))] = "tweaked"
+    return RecipeRecord(recipe_id, record.name, record.cooking_time, record.origin, " ".join(words), list(record.ingredients))
+
+
+def main():
+    rng = random.Random(1)
+    records = list(make_varied_records(SIZE))
+    pairs = []
+    for record in records[::DUPLICATE_EVERY]:
+        copy = near_copy(record, len(records) + 1, rng)
+        records.append(copy)
+        pairs.append((record.recipe_id, copy.recipe_id))
+
+    start = time.perf_counter()
+    index = NearDuplicateIndex(records)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    clusters = index.clusters()
+    cluster = time.perf_counter() - start
+
+    cluster_of = {recipe_id: i for i, group in enumerate(clusters) for recipe_id in group}
+    found = sum(1 for a, b in pairs if a in cluster_of and cluster_of[a] == cluster_of.get(b))
+    print(f"{len(records)} recipes: signatures {build:.2f} s, clustering {cluster:.2f} s")
+    print(f"{len(clusters)} clusters, {found} of {len(pairs)} planted near-duplicates found")
+
+    start = time.perf_counter()
+    for record in records[:1000]:
+        index.similar(record)
+    print(f"similar() on add: {(time.perf_counter() - start):.3f} ms per recipe")
+
+
+if __name__ == "__main__":
+    main()
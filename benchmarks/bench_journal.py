@@ -0,0 +1,59 @@
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_records
+from core import RecipeLibrary
+
+SIZE = 100_000
+EDITS = 1000
+
+
+def main():
+    # traced from the start: after Delete All everything still allocated is
+    # what the undo entry keeps alive, the indexes included if it held them
+    tracemalloc.start()
+    library = RecipeLibrary()
+    library.add_many(make_records(SIZE))
+    gc.collect()
+    before, _ = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    library.clear()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"delete all {SIZE} recipes           {elapsed * 1000:>8.1f} ms")
+    print(f"memory before delete all           {before / 2 ** 20:>8.1f} MiB")
+    print(f"kept alive for undo                {after / 2 ** 20:>8.1f} MiB")
+    start = time.perf_counter()
+    library.undo()
+    print(f"undo delete all                    {(time.perf_counter() - start) * 1000:>8.1f} ms")
+    start = time.perf_counter()
+    library.ensure_indexed()
+    print(f"search index rebuilt after undo    {(time.perf_counter() - start) * 1000:>8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recipes.db")
+        library.save_as(path)
+        library.open(path)
+        start = time.perf_counter()
+        for recipe_id in range(1, EDITS + 1):
+            library.update(library.records.get(recipe_id), name=f"Edited {recipe_id}")
+        print(f"{EDITS} logged edits                  {(time.perf_counter() - start) * 1000 / EDITS:>8.3f} ms per edit")
+
+        # reopening without saving is what happens after a crash
+        recovered = RecipeLibrary()
+        start = time.perf_counter()
+        recovered.open(path)
+        print(f"open and replay {EDITS} changes        {(time.perf_counter() - start) * 1000:>8.1f} ms")
+        assert recovered.records.get(EDITS).name == f"Edited {EDITS}"
+        library.close()
+        recovered.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import time
+
+from benchmarks.synthetic import make_records
+from core import RecipeLibrary
+
+SIZE = 50_000
+
+
+def main():
+    library = RecipeLibrary()
+    library.add_many(make_records(SIZE))
+    library.ensure_indexed()
+
+    # Select All hands the view's ids over, Copy resolves them through the store
+    selected_ids = list(library.records.ids())
+    start = time.perf_counter()
+    copied = library.records.get_many(selected_ids)
+    copy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pasted = library.paste(copied)
+    paste_time = time.perf_counter() - start
+    print(f"copy {len(copied)} recipes            {copy_time * 1000:>8.1f} ms")
+    print(f"paste {len(pasted)} recipes           {paste_time * 1000:>8.1f} ms")
+    print(f"ids {pasted[0].recipe_id}..{pasted[-1].recipe_id}, next free {library.records.next_id()}")
+
+    start = time.perf_counter()
+    library.undo()
+    print(f"undo paste                     {(time.perf_counter() - start) * 1000:>8.1f} ms")
+    assert library.records.next_id() == 2 * SIZE + 1, "ids must not be handed out twice"
+    assert len(library.query("spicy")) == len(library.query("spicy", sort_by="id"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import time
+
+from benchmarks.synthetic import make_records
+from ingredients import DEFAULT_INGREDIENTS
+from pipeline import clean_records
+
+SIZE = 200_000
+
+
+def main():
+    records = list(make_records(SIZE))
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        failed = sum(not report.ok for report in clean_records(records, DEFAULT_INGREDIENTS, workers))
+        rate = SIZE / (time.perf_counter() - start)
+        print(f"{workers:>2} workers  {rate:>9.0f} rec/s  ({failed} flagged)")
+        if workers >= (os.cpu_count() or 1):
+            break
+        workers = min(workers * 2, os.cpu_count())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import gc
+import random
+import time
+import tracemalloc
+
+from benchmarks.synthetic import ORIGINS
+from records import RecipeColumns, RecipeRecord
+
+SIZE = 1_000_000
+
+
+class LegacyRecipeRecord:
+    # RecipeRecord as it was before __slots__ and typed fields
+    def __init__(self, recipe_id, name, cooking_time, origin, description, ingredients=None, image_path=''):
+        self.recipe_id = recipe_id
+        self.name = name
+        self.cooking_time = cooking_time
+        self.origin = origin
+        self.description = description
+        self.ingredients = ingredients if ingredients else []
+        self.image_path = image_path
+
+
+def make_rows(count):
+    # Field values as a file loader would produce them: every origin and
+    # cooking time is a fresh string. Names and descriptions are shared so the
+    # numbers below show per-record overhead, not text size.
+    rng = random.Random(0)
+    for recipe_id in range(1, count + 1):
+        yield recipe_id, "Recipe", str(rng.randint(5, 240)), "".join(rng.choice(ORIGINS)), "Description"
+
+
+def measure(label, build):
+    gc.collect()
+    start = time.perf_counter()
+    build(make_rows(SIZE))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    # memory retained by the loaded collection, transient row tuples excluded
+    tracemalloc.start()
+    result = build(make_rows(SIZE))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {size / SIZE:>8.1f} bytes/record  load {elapsed:>6.2f} s")
+    return result
+
+
+def main():
+    print(f"{SIZE} records")
+    measure("legacy class", lambda rows: [LegacyRecipeRecord(*row) for row in rows])
+    measure("slots RecipeRecord", lambda rows: [RecipeRecord(*row) for row in rows])
+    measure("RecipeColumns", lambda rows: RecipeColumns(RecipeRecord(*row) for row in rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import time
+
+from benchmarks.synthetic import make_records
+from search import SearchIndex
+
+SIZE = 100_000
+QUERIES = ["chicken", "spicy curry", "cr", "baked bread ital", "tomato basil", "dumplings jap"]
+REPEAT = 20
+
+
+def main():
+    records = list(make_records(SIZE))
+    start = time.perf_counter()
+    index = SearchIndex(records)
+    print(f"build index for {SIZE} records      {(time.perf_counter() - start) * 1000:>8.1f} ms")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            results = index.search(query, limit=100)
+        elapsed = (time.perf_counter() - start) * 1000 / REPEAT
+        print(f"search {query!r:<22} top 100  {elapsed:>8.2f} ms  ({len(results)} shown)")
+
+    record = records[SIZE // 2]
+    start = time.perf_counter()
+    for i in range(1000):
+        record.name = f"Renamed recipe {i}"
+        index.update(record)
+    print(f"incremental update                 {(time.perf_counter() - start):>8.3f} ms per record")
+
+
+if __name__ == "__main__":
+    main()
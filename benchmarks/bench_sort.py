@@ -0,0 +1,47 @@
+import time
+
+from benchmarks.synthetic import make_records
+from core import RecipeLibrary
+from records import SORT_KEYS, RecipeRecord
+
+SIZE = 100_000
+REPEAT = 20
+
+
+def timed(label, action):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = action()
+    elapsed = (time.perf_counter() - start) * 1000 / REPEAT
+    print(f"{label:<40} {elapsed:>8.2f} ms  ({len(result)} rows)")
+
+
+def main():
+    library = RecipeLibrary()
+    library.add_many(make_records(SIZE))
+
+    for column in SORT_KEYS:
+        start = time.perf_counter()
+        library.records.sorted_ids(column)
+        print(f"build {column:<34} {(time.perf_counter() - start) * 1000:>8.2f} ms")
+
+    for column in SORT_KEYS:
+        timed(f"sort by {column}", lambda: library.query(sort_by=column))
+        timed(f"sort by {column} descending", lambda: library.query(sort_by=column, descending=True))
+    timed("re-sort after one edit", lambda: (
+        library.update(library.records.get(SIZE // 2), name=f"Edited {time.perf_counter()}"),
+        library.query(sort_by="name"),
+    )[1])
+    timed("origin = Italy, sort by name", lambda: library.query(origin="Italy", sort_by="name"))
+    timed("30 <= cooking time <= 60, sort by time", lambda: library.query(cooking_time=(30, 60), sort_by="cooking_time"))
+    library.ensure_indexed()
+    timed("search 'spicy', sort by origin", lambda: library.query("spicy", sort_by="origin"))
+
+    start = time.perf_counter()
+    for i in range(1000):
+        library.add(RecipeRecord(SIZE + 1 + i, f"Added {i}", "30", "Italy", "description"))
+    print(f"{'add with all columns indexed':<40} {(time.perf_counter() - start):>8.3f} ms per record")
+
+
+if __name__ == "__main__":
+    main()
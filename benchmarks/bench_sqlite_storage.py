@@ -0,0 +1,49 @@
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_records
+from records import RecipeStore
+from storage import SqliteStorage
+
+SIZE = 100_000
+EDITS = 500
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<32} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    return result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recipes.db")
+        storage = SqliteStorage(path)
+        store = RecipeStore()
+        store.storage = storage
+        for record in make_records(SIZE):
+            store.add(record)
+        timed(f"initial save of {SIZE} records", storage.flush)
+        storage.close()
+
+        storage = SqliteStorage(path)
+        store = RecipeStore()
+        timed("open (ids only)", lambda: store.attach(storage))
+        timed("fetch first 100 rows", lambda: [store.get(i) for i in range(1, 101)])
+
+        def edit():
+            for i in range(EDITS):
+                record = store.get(i * 97 % SIZE + 1)
+                store.update(record, name=f"Edited {i}")
+            store.remove(SIZE)
+
+        timed(f"{EDITS} edits + 1 delete in memory", edit)
+        timed("save edits (one transaction)", storage.flush)
+        timed("load remaining records", lambda: len(store.by_origin("Italy")))
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
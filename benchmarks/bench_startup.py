@@ -0,0 +1,47 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from storage import SqliteStorage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+# builds the window, lets Tk draw it once and quits
+GUI_LAUNCH = "import main; app = main.MainApp(); app.root.update(); app.root.destroy()"
+
+
+def run(args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+    return statistics.median(timings), None
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "recipes.db")
+        # query refuses a missing database, an empty one times startup alone
+        SqliteStorage(database).close()
+        cases = [
+            ("python startup", ["-c", "pass"]),
+            ("import core", ["-c", "import core"]),
+            ("cli query", ["cli.py", "query", database, "--limit", "10"]),
+            ("gui launch", ["-c", GUI_LAUNCH]),
+        ]
+        for label, args in cases:
+            median, error = run(args)
+            if median is None:
+                print(f"{label:<16} skipped: {error}")
+            else:
+                print(f"{label:<16} {median * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_records
+from records import RecipeStore
+from transfer import BackgroundTask, read_records, write_records
+
+SIZE = 100_000
+
+
+def drain(task, handle_item):
+    # stands in for the Tk after() loop in MainApp._run_transfer
+    while not task.done:
+        items = task.poll()
+        if not items:
+            time.sleep(0.001)
+        for item in items:
+            handle_item(item)
+    if task.error:
+        raise task.error
+
+
+def main():
+    records = list(make_records(SIZE))
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ("jsonl", "csv"):
+            path = os.path.join(directory, f"recipes.{extension}")
+
+            start = time.perf_counter()
+            drain(BackgroundTask(write_records(path, records, len(records))).start(), lambda fraction: None)
+            export_rate = SIZE / (time.perf_counter() - start)
+
+            store = RecipeStore()
+            start = time.perf_counter()
+            drain(BackgroundTask(read_records(path)).start(), lambda item: store.add_many(item[0]))
+            import_rate = SIZE / (time.perf_counter() - start)
+            assert len(store) == SIZE
+
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{extension:<6} {size_mb:>7.1f} MB  export {export_rate:>9.0f} rec/s  import {import_rate:>9.0f} rec/s")
+
+
+if __name__ == "__main__":
+    main()
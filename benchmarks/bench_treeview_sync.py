@@ -0,0 +1,69 @@
+import time
+from tkinter import Tk, ttk
+
+from benchmarks.synthetic import make_records
+from records import RecipeStore
+from treeview_sync import TreeviewSync
+
+SIZES = [100, 1_000, 10_000, 100_000]
+EDITS = 200
+
+
+def rebuild(treeview, store):
+    # what MainApp._add_records used to do on every edit
+    for i in treeview.get_children():
+        treeview.delete(i)
+    for record in store:
+        treeview.insert("", "end", values=(record.recipe_id, record.name, record.cooking_time, record.origin))
+
+
+def per_edit_ms(func, count):
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    root = Tk()
+    root.withdraw()
+    print(f"{'records':>8} {'edit ms':>9} {'add ms':>9} {'delete ms':>10} {'rebuild ms':>11}")
+    for size in SIZES:
+        treeview = ttk.Treeview(root, columns=("id", "name", "cooking_time", "origin"), show='headings')
+        store = RecipeStore(make_records(size))
+        tree_sync = TreeviewSync(treeview)
+        tree_sync.sync(store)
+        ids = list(store.ids())
+
+        def edit(i):
+            record = store.get(ids[i * 7919 % size])
+            store.update(record, name=f"Edited {i}")
+            tree_sync.upsert(record)
+
+        added = []
+
+        def add(i):
+            record = next(make_records(1, seed=i))
+            record.recipe_id = store.next_id()
+            store.add(record)
+            tree_sync.upsert(record)
+            added.append(record.recipe_id)
+
+        def delete(i):
+            recipe_id = added.pop()
+            store.remove(recipe_id)
+            tree_sync.remove(recipe_id)
+
+        edit_ms = per_edit_ms(edit, EDITS)
+        add_ms = per_edit_ms(add, EDITS)
+        delete_ms = per_edit_ms(delete, EDITS)
+        # a single full rebuild is enough to show the O(n) cost being avoided
+        tree_sync.clear()
+        rebuild_ms = per_edit_ms(lambda i: rebuild(treeview, store), 1)
+        print(f"{size:>8} {edit_ms:>9.3f} {add_ms:>9.3f} {delete_ms:>10.3f} {rebuild_ms:>11.1f}")
+        treeview.destroy()
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
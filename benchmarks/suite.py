@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from benchmarks.synthetic import make_records
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERIES = ["chicken", "spicy curry", "cr", "baked bread ital"]
+REPEAT = 5
+VIRTUAL_LIST_THRESHOLD = 10_000
+IMAGE_SIZE = (3000, 2000)
+SAVE_CHUNK = 100_000
+# differences below this are timer noise on the small sizes
+NOISE_FLOOR = 1.0
+
+
+def peak_memory_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def timed(results, name, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    results[name] = (time.perf_counter() - start) * 1000 / repeat
+    return result
+
+
+def make_view():
+    # a withdrawn Treeview like the main window's, None without a display
+    try:
+        from tkinter import Tk, ttk
+        root = Tk()
+    except Exception:
+        return None, None
+    root.withdraw()
+    treeview = ttk.Treeview(root, columns=("id", "name", "cooking_time", "origin"), show='headings', height=20)
+    scrollbar = ttk.Scrollbar(root, command=treeview.yview)
+    return root, (treeview, scrollbar)
+
+
+def measure_size(size):
+    # Runs in its own process so the peak memory belongs to this size alone
+    from core import RecipeLibrary
+    from storage import SqliteStorage
+    from treeview_sync import TreeviewSync, VirtualTreeview
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "recipes.db")
+        # written in chunks so the generated records never all sit in memory
+        storage = SqliteStorage(path)
+        records = make_records(size)
+        results["save"] = 0.0
+        while True:
+            chunk = list(islice(records, SAVE_CHUNK))
+            if not chunk:
+                break
+            for record in chunk:
+                storage.write(record)
+            start = time.perf_counter()
+            storage.flush()
+            results["save"] += (time.perf_counter() - start) * 1000
+        storage.close()
+
+        library = RecipeLibrary()
+        timed(results, "open", lambda: library.open(path))
+        timed(results, "load all", lambda: list(library.records))
+        timed(results, "index", library.ensure_indexed)
+
+        root, widgets = make_view()
+        if widgets is not None:
+            treeview, scrollbar = widgets
+            if size >= VIRTUAL_LIST_THRESHOLD:
+                view = VirtualTreeview(treeview, scrollbar, library.records.get_many)
+                timed(results, "refresh", lambda: view.sync_ids(library.records.ids()))
+            else:
+                view = TreeviewSync(treeview)
+                timed(results, "refresh", lambda: view.sync(library.records))
+            root.destroy()
+
+        for query in QUERIES:
+            timed(results, f"search {query!r}", lambda: library.query(query), REPEAT)
+        timed(results, "sort by name", lambda: library.query(sort_by="name"))
+        timed(results, "re-sort by name", lambda: library.query(sort_by="name", descending=True), REPEAT)
+        library.close()
+    results["peak memory MB"] = peak_memory_mb()
+    return results
+
+
+def measure_image():
+    try:
+        from PIL import Image
+    except ImportError:
+        return {}
+    from thumbnails import ThumbnailDiskCache, decode_thumbnail
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "photo.jpg")
+        Image.effect_noise(IMAGE_SIZE, 64).convert("RGB").save(path, quality=90)
+        timed(results, "decode thumbnail", lambda: decode_thumbnail(path), REPEAT)
+        cache = ThumbnailDiskCache(os.path.join(directory, "cache"))
+        timed(results, "thumbnail first view", lambda: cache.load(path))
+        timed(results, "thumbnail cached", lambda: cache.load(path), REPEAT)
+    return results
+
+
+def run_size(size):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--worker", str(size)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    return json.loads(output.stdout)
+
+
+def compare(results, baseline, tolerance):
+    # timings more than tolerance slower than the baseline, memory included
+    regressions = []
+    for group, measured in results.items():
+        for name, value in measured.items():
+            before = baseline.get(group, {}).get(name)
+            if value is None or before is None or before <= 0:
+                continue
+            if value > before * (1 + tolerance) and value - before > NOISE_FLOOR:
+                regressions.append(f"{group} {name}: {before:.1f} -> {value:.1f} ({value / before - 1:+.0%})")
+    return regressions
+
+
+def print_results(results):
+    for group, measured in results.items():
+        print(group)
+        for name, value in measured.items():
+            unit = "" if name.endswith("MB") else " ms"
+            print(f"  {name:<28} {'n/a' if value is None else f'{value:>10.2f}{unit}'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time load, refresh, search and image display on synthetic libraries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(measure_size(args.worker)))
+        return 0
+
+    results = {}
+    for size in args.sizes:
+        results[f"{size} recipes"] = run_size(size)
+    image = measure_image()
+    if image:
+        results["image display"] = image
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
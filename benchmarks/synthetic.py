@@ -0,0 +1,25 @@
+import random
+
+from records import RecipeRecord
+
+ORIGINS = ["Italy", "France", "Mexico", "Japan", "India", "China", "Spain", "Greece", "Thailand", "Czechia"]
+WORDS = [
+    "roasted", "spicy", "creamy", "grilled", "baked", "fresh", "sweet", "sour",
+    "chicken", "beef", "tofu", "pasta", "rice", "soup", "salad", "curry",
+    "noodles", "pie", "stew", "cake", "bread", "sauce", "dumplings", "tacos",
+]
+INGREDIENTS = ["Salt", "Pepper", "Sugar", "Flour", "Butter", "Eggs", "Milk", "Onion", "Garlic", "Tomato", "Basil"]
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    for recipe_id in range(1, count + 1):
+        name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+        yield RecipeRecord(
+            recipe_id,
+            name,
+            str(rng.randint(5, 240)),
+            rng.choice(ORIGINS),
+            " ".join(rng.choice(WORDS) for _ in range(20)),
+            ingredients=rng.sample(INGREDIENTS, rng.randint(1, 5)),
+        )
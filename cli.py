@@ -0,0 +1,223 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+from core import RecipeLibrary
+from pipeline import clean_records
+from profiling import profiler
+from records import SORT_KEYS, RecipeRecord
+from transfer import read_records
+
+
+def open_library(path, create=False):
+    # only commands that add recipes may start a new database file
+    if not create and not os.path.exists(path):
+        raise FileNotFoundError(f"No such database: {path}")
+    library = RecipeLibrary()
+    library.open(path)
+    return library
+
+
+def cmd_add(args):
+    library = open_library(args.db, create=True)
+    record = RecipeRecord(
+        library.records.next_id(), args.name, args.cooking_time, args.origin or "None",
+        args.description, ingredients=args.ingredient, image_path=args.image or '',
+    )
+    if not record.is_valid():
+        print("Invalid record, check the input values.", file=sys.stderr)
+        return 1
+    library.add(record)
+    library.save()
+    print(record.recipe_id)
+    return 0
+
+
+def cmd_query(args):
+    library = open_library(args.db)
+    if args.text:
+        library.ensure_indexed()
+    cooking_time = None
+    if args.min_time is not None or args.max_time is not None:
+        cooking_time = (args.min_time or 0, args.max_time if args.max_time is not None else sys.maxsize)
+    ids = library.query(
+        args.text, args.with_ingredient, args.without_ingredient, args.makeable,
+        origin=args.origin, cooking_time=cooking_time, sort_by=args.sort, descending=args.descending,
+    )
+    if ids is None:
+        ids = list(library.records.ids())
+    for record in library.records.get_many(ids[:args.limit]):
+        print(f"{record.recipe_id}\t{record.name}\t{record.cooking_time}\t{record.origin}")
+    return 0
+
+
+def cmd_import(args):
+    library = open_library(args.db, create=True)
+    count, skipped = library.import_records(args.file)
+    library.save()
+    print(f"Imported {count} recipes.")
+    if skipped:
+        print(f"Skipped {skipped} invalid recipes.", file=sys.stderr)
+    return 0
+
+
+def cmd_import_ingredients(args):
+    library = open_library(args.db, create=True)
+    count = library.import_ingredients(args.file)
+    library.save()
+    print(f"Imported {count} ingredients.")
+    return 0
+
+
+def cmd_export(args):
+    library = open_library(args.db)
+    print(f"Exported {library.export_records(args.file)} recipes.")
+    return 0
+
+
+def cmd_export_ingredients(args):
+    library = open_library(args.db)
+    print(f"Exported {library.export_ingredients(args.file)} ingredients.")
+    return 0
+
+
+def print_report(report, labels):
+    # A recipe id for a database, the row number for a file. labels maps the
+    # position of each record a later one may duplicate to its label.
+    label = report.record.recipe_id if report.record.recipe_id is not None else f"#{report.position + 1}"
+    for error in report.errors:
+        print(f"{label}\terror\t{error}")
+    for warning in report.warnings:
+        print(f"{label}\twarning\t{warning}")
+    if report.duplicate_of is not None:
+        print(f"{label}\tduplicate\tsame as {labels[report.duplicate_of]}")
+    elif not report.errors:
+        labels[report.position] = label
+
+
+def cmd_validate(args):
+    library = RecipeLibrary()
+    if args.source.lower().endswith((".jsonl", ".csv")):
+        # files are streamed straight through the pipeline
+        records = (record for batch, _ in read_records(args.source) for record in batch)
+    else:
+        library = open_library(args.source)
+        records = library.records
+    total = failed = 0
+    labels = {}
+    for report in clean_records(records, library.ingredients, args.workers):
+        total += 1
+        failed += not report.ok
+        print_report(report, labels)
+    print(f"{failed} of {total} recipes are invalid or duplicates.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_clean(args):
+    library = open_library(args.db)
+    removed = invalid = 0
+    labels = {}
+    for report in library.clean(args.workers):
+        removed += report.duplicate_of is not None
+        invalid += bool(report.errors)
+        print_report(report, labels)
+    library.save()
+    print(f"Removed {removed} duplicates, {invalid} invalid recipes left unchanged.", file=sys.stderr)
+    return 0
+
+
+def cmd_duplicates(args):
+    library = open_library(args.db)
+    clusters = library.find_duplicates()
+    for number, cluster in enumerate(clusters, 1):
+        for record in library.records.get_many(cluster):
+            print(f"{number}\t{record.recipe_id}\t{record.name}\t{record.origin}")
+    print(f"{len(clusters)} groups of similar recipes.", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="recipepy", description="Work with a recipe database without the GUI.")
+    parser.add_argument("--profile", action="store_true", help="print latency histograms of the timed operations to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add one recipe")
+    add.add_argument("db")
+    add.add_argument("--name", required=True)
+    add.add_argument("--cooking-time", required=True)
+    add.add_argument("--origin")
+    add.add_argument("--description", required=True)
+    add.add_argument("--ingredient", action="append", default=[])
+    add.add_argument("--image")
+    add.set_defaults(func=cmd_add)
+
+    query = commands.add_parser("query", help="search recipes")
+    query.add_argument("db")
+    query.add_argument("text", nargs="?", default='')
+    query.add_argument("--with", dest="with_ingredient", action="append", default=[])
+    query.add_argument("--without", dest="without_ingredient", action="append", default=[])
+    query.add_argument("--makeable", action="store_true", help="only recipes made from the --with ingredients")
+    query.add_argument("--origin", help="only recipes from this origin")
+    query.add_argument("--min-time", type=int, help="shortest cooking time in minutes")
+    query.add_argument("--max-time", type=int, help="longest cooking time in minutes")
+    query.add_argument("--sort", choices=sorted(SORT_KEYS), help="order by a column instead of search rank")
+    query.add_argument("--descending", action="store_true")
+    query.add_argument("--limit", type=int, default=50)
+    query.set_defaults(func=cmd_query)
+
+    import_ = commands.add_parser("import", help="bulk add recipes from a .jsonl or .csv file")
+    import_.add_argument("db")
+    import_.add_argument("file")
+    import_.set_defaults(func=cmd_import)
+
+    import_ingredients = commands.add_parser("import-ingredients", help="add ingredients from a text or .csv file")
+    import_ingredients.add_argument("db")
+    import_ingredients.add_argument("file")
+    import_ingredients.set_defaults(func=cmd_import_ingredients)
+
+    export = commands.add_parser("export", help="write all recipes to a .jsonl or .csv file")
+    export.add_argument("db")
+    export.add_argument("file")
+    export.set_defaults(func=cmd_export)
+
+    export_ingredients = commands.add_parser("export-ingredients", help="write all ingredients to a text or .csv file")
+    export_ingredients.add_argument("db")
+    export_ingredients.add_argument("file")
+    export_ingredients.set_defaults(func=cmd_export_ingredients)
+
+    validate = commands.add_parser("validate", help="report invalid and duplicate recipes in a database or .jsonl/.csv file")
+    validate.add_argument("source")
+    validate.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    validate.set_defaults(func=cmd_validate)
+
+    clean = commands.add_parser("clean", help="normalize recipes and remove duplicates")
+    clean.add_argument("db")
+    clean.add_argument("--workers", type=int, help="worker processes, defaults to the CPU count")
+    clean.set_defaults(func=cmd_clean)
+
+    duplicates = commands.add_parser("duplicates", help="list groups of near-duplicate recipes")
+    duplicates.add_argument("db")
+    duplicates.set_defaults(func=cmd_duplicates)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        profiler.enabled = True
+    try:
+        return args.func(args)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except sqlite3.DatabaseError as e:
+        print(f"Cannot open database: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if profiler.enabled:
+            print(profiler.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+from dedup import NearDuplicateIndex
+from ingredients import DEFAULT_INGREDIENTS, IngredientCatalog
+from journal import Journal, journal_path, replay
+from pipeline import clean_records
+from profiling import profiler
+from records import RecipeStore
+from search import SearchIndex
+from storage import SqliteStorage
+from transfer import read_ingredients, read_records, record_from_dict, write_ingredients, write_records
+
+
+class RecipeLibrary:
+    # Everything the app knows about recipes without any Tk: the store, the
+    # ingredient catalog, the search and near-duplicate indexes and the
+    # optional SQLite file, plus the undo journal that doubles as its
+    # write-ahead log.
+    # MainApp and the command line both work through this class.
+    def __init__(self):
+        self.ingredients = IngredientCatalog(DEFAULT_INGREDIENTS)
+        self.records = RecipeStore(catalog=self.ingredients)
+        self.search_index = SearchIndex()
+        self.duplicates = NearDuplicateIndex()
+        self.journal = Journal()
+        self.storage = None
+
+    @property
+    def path(self):
+        return self.storage.path if self.storage is not None else None
+
+    @property
+    def dirty(self):
+        # True while closing would lose changes, recipes never saved to a file included
+        if self.storage is None:
+            return len(self.records) > 0
+        return self.storage.dirty
+
+    def discard_changes(self):
+        # Unsaved changes stop being replayed on the next open. Replay is
+        # for crashes, not for changes the user chose not to save.
+        self.journal.truncate_log()
+
+    def new(self):
+        # the unsaved changes of the current file are thrown away on purpose
+        self.journal.close_log(discard=True)
+        self.close()
+        self.records.detach()
+        self.search_index.clear()
+        self.duplicates.clear()
+        self.journal.clear_history()
+
+    @profiler.timed("load")
+    def open(self, path):
+        # the new file is opened first, one that isn't a database leaves the
+        # current one open and untouched
+        storage = SqliteStorage(path)
+        self.close()
+        self.storage = storage
+        # Only recipe ids are read here, rows are fetched when needed
+        self.records.attach(self.storage)
+        for name in self.storage.load_ingredients():
+            self.ingredients.add(name)
+        self.search_index.clear()
+        self.search_index.stale = True
+        self.duplicates.clear()
+        self.duplicates.stale = True
+        self.journal.clear_history()
+        # changes that were never saved, e.g. before a crash, are applied again
+        for entry in replay(journal_path(path)):
+            self._replay(entry)
+        self.journal.open_log(journal_path(path))
+
+    @profiler.timed("save")
+    def save(self):
+        self.storage.save_ingredients(self.ingredients)
+        self.storage.save_next_id(self.records.next_id())
+        self.storage.flush()
+        self.journal.truncate_log()
+
+    @profiler.timed("save")
+    def save_as(self, path):
+        storage = SqliteStorage(path)
+        storage.clear()
+        for record in self.records:
+            storage.write(record)
+        storage.save_ingredients(self.ingredients)
+        storage.save_next_id(self.records.next_id())
+        storage.flush()
+        # the old file keeps its saved state, its pending changes now live in the new one
+        self.journal.close_log(discard=True)
+        self.close()
+        self.storage = storage
+        self.records.storage = storage
+        self.journal.open_log(journal_path(path))
+        self.journal.truncate_log()
+
+    def close(self):
+        self.journal.close_log()
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+
+    def add(self, record):
+        if not record.is_valid():
+            raise ValueError(f"Invalid recipe: {record.name!r}")
+        self._insert([record])
+        self.journal.record(("add", [record]))
+        return record
+
+    def add_many(self, records):
+        # records the database could not hold, e.g. without a cooking time,
+        # are left out: the caller compares counts to report them
+        added = self.records.add_many([record for record in records if record.is_valid()])
+        self._index(added)
+        # a batch with nothing valid leaves no undo step and no log entry
+        if added:
+            self.journal.record(("add", added))
+        return added
+
+    @profiler.timed("paste")
+    def paste(self, records):
+        # Copies of records under fresh ids, added as one batch and one undo
+        # step. A copy has its source's text, so its index entries are copied
+        # instead of tokenized and hashed again.
+        copies = [record.copy(recipe_id) for record, recipe_id in zip(records, self.records.allocate_ids(len(records)))]
+        for record, copy in zip(records, copies):
+            self.records.add(copy)
+            self.search_index.copy(record.recipe_id, copy)
+            self.duplicates.copy(record.recipe_id, copy)
+        self.journal.record(("add", copies))
+        return copies
+
+    def update(self, record, **fields):
+        before = self._set_valid_fields(record, fields)
+        self.journal.record(("update", (record.recipe_id, before, fields)))
+        return record
+
+    def remove(self, recipe_id):
+        # loaded first so undo can put the record back
+        record = self.records.get(recipe_id)
+        if record is None:
+            return None
+        self._delete(recipe_id)
+        self.journal.record(("remove", [record]))
+        return record
+
+    def clear(self):
+        # The journal keeps the records, not the indexes over them: undo
+        # marks the indexes stale and they are rebuilt when next needed
+        records = list(self.records)
+        self._clear()
+        if records:
+            self.journal.record(("clear", records))
+
+    def undo(self):
+        # Reverts the last change, returns False when there is nothing to undo
+        change = self.journal.undo()
+        if change is not None:
+            self._apply(change)
+        return change is not None
+
+    def redo(self):
+        change = self.journal.redo()
+        if change is not None:
+            self._apply(change)
+        return change is not None
+
+    def _index(self, records):
+        for record in records:
+            self.search_index.add(record)
+            self.duplicates.add(record)
+
+    def _insert(self, records):
+        for record in records:
+            self.records.add(record)
+        self._index(records)
+
+    def _delete(self, recipe_id):
+        self.search_index.remove(recipe_id)
+        self.duplicates.remove(recipe_id)
+        return self.records.remove(recipe_id)
+
+    def _set_fields(self, record, fields):
+        self.records.update(record, **fields)
+        self.search_index.update(record)
+        self.duplicates.update(record)
+
+    def _set_valid_fields(self, record, fields):
+        # Like _set_fields, but an edit that leaves the record invalid is
+        # rolled back and raises ValueError. Returns the replaced values.
+        before = {field: getattr(record, field) for field in fields}
+        self._set_fields(record, fields)
+        if not record.is_valid():
+            self._set_fields(record, before)
+            raise ValueError(f"Invalid recipe: {record.recipe_id}")
+        return before
+
+    def _clear(self):
+        self.records.clear()
+        self.search_index.clear()
+        self.duplicates.clear()
+
+    def _apply(self, change):
+        # applies a journal change without recording it again
+        kind, data = change
+        if kind == "add":
+            self._insert(data)
+        elif kind == "remove":
+            for record in data:
+                self._delete(record.recipe_id)
+        elif kind == "update":
+            recipe_id, _, after = data
+            self._set_fields(self.records.get(recipe_id), after)
+        elif kind == "clear":
+            self._clear()
+        elif kind == "restore":
+            for record in data:
+                self.records.add(record)
+            self.search_index.stale = True
+            self.duplicates.stale = True
+        else:
+            for part in data:
+                self._apply(part)
+
+    def _replay(self, entry):
+        # Entries are idempotent: a crash between flush and truncate_log
+        # replays changes the database already has and nothing breaks.
+        # Invalid records are dropped, they could never be saved.
+        op = entry["op"]
+        if op == "add":
+            records = [record for record in map(record_from_dict, entry["records"]) if record.is_valid()]
+            for record in records:
+                if record.recipe_id in self.records:
+                    self._delete(record.recipe_id)
+            self._insert(records)
+        elif op == "remove":
+            for recipe_id in entry["ids"]:
+                self._delete(recipe_id)
+        elif op == "update":
+            record = self.records.get(entry["id"])
+            if record is not None:
+                try:
+                    self._set_valid_fields(record, entry["fields"])
+                except ValueError:
+                    pass
+        elif op == "clear":
+            self._clear()
+
+    def index_chunks(self, chunk_size=2000):
+        # Rebuilds the search and duplicate indexes from a stream of rows,
+        # yielding after every chunk so a GUI can keep handling events.
+        # Rows are not kept in the store, a lazily opened file stays lazy.
+        self.search_index.clear()
+        self.duplicates.clear()
+        for count, record in enumerate(self.records.rows(), 1):
+            self._index([record])
+            if count % chunk_size == 0:
+                yield
+        self.search_index.stale = False
+        self.duplicates.stale = False
+
+    def ensure_indexed(self):
+        if self.search_index.stale:
+            self.search_index.rebuild(self.records.rows())
+
+    def _ensure_duplicates_indexed(self):
+        if self.duplicates.stale:
+            self.duplicates.rebuild(self.records.rows())
+
+    def similar(self, record):
+        # [(recipe_id, similarity)] of stored recipes that look like record
+        self._ensure_duplicates_indexed()
+        return self.duplicates.similar(record)
+
+    def find_duplicates(self):
+        # Lists of recipe ids that are near copies of each other
+        self._ensure_duplicates_indexed()
+        return self.duplicates.clusters()
+
+    @profiler.timed("query")
+    def query(self, text='', include=(), exclude=(), makeable=False, origin=None, cooking_time=None, sort_by=None, descending=False):
+        # Recipe ids matching all given criteria, None means everything.
+        # Ids come in rank order unless sort_by names a column to order by.
+        text = text.strip()
+        ids = self.search_index.search(text) if text else None
+        allowed = None
+        if include or exclude or makeable:
+            if makeable:
+                allowed = self.records.ids_makeable_with(include)
+                if exclude:
+                    allowed &= self.records.ids_with_ingredients(exclude=exclude)
+            else:
+                allowed = self.records.ids_with_ingredients(include, exclude)
+        if origin is not None:
+            matching = self.records.ids_with_origin(origin)
+            allowed = matching if allowed is None else allowed & matching
+        if cooking_time is not None:
+            matching = set(self.records.ids_with_cooking_time(*cooking_time))
+            allowed = matching if allowed is None else allowed & matching
+        if sort_by is not None:
+            # the presorted column decides the order, matches only filter it
+            ordered = self.records.sorted_ids(sort_by, descending)
+            if ids is None and allowed is None:
+                return ordered
+            if ids is not None:
+                allowed = set(ids) if allowed is None else allowed.intersection(ids)
+            return [i for i in ordered if i in allowed]
+        if allowed is not None:
+            ids = [i for i in (self.records.ids() if ids is None else ids) if i in allowed]
+        return ids
+
+    def clean(self, workers=None):
+        # Applies normalization in place and drops duplicates, yields every
+        # report. The whole run is one undo step.
+        with self.journal.group():
+            yield from self._clean(workers)
+
+    def _clean(self, workers):
+        for report in clean_records(list(self.records), self.ingredients, workers):
+            recipe_id = report.record.recipe_id
+            if report.duplicate_of is not None:
+                self.remove(recipe_id)
+            elif report.changes and not report.errors:
+                # only what normalizing changed is written, logged and undoable
+                self.update(report.record, **report.changes)
+            yield report
+
+    @profiler.timed("import")
+    def import_records(self, path):
+        # (recipes added, invalid recipes skipped)
+        count = skipped = 0
+        for batch, _ in read_records(path):
+            added = len(self.add_many(batch))
+            count += added
+            skipped += len(batch) - added
+        return count, skipped
+
+    @profiler.timed("export")
+    def export_records(self, path):
+        total = len(self.records)
+        for _ in write_records(path, self.records.snapshot(), total):
+            pass
+        return total
+
+    def export_ingredients(self, path):
+        names = list(self.ingredients)
+        for _ in write_ingredients(path, names, len(names)):
+            pass
+        return len(names)
+
+    def import_ingredients(self, path):
+        count = len(self.ingredients)
+        for names, _ in read_ingredients(path):
+            for name in names:
+                self.ingredients.add(name)
+        return len(self.ingredients) - count
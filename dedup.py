@@ -0,0 +1,210 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+NUM_HASHES = 64
+BANDS = 16
+THRESHOLD = 0.7
+# buckets this large come from boilerplate text shared by many recipes,
+# comparing all their pairs would bring back the quadratic cost
+MAX_BUCKET = 200
+
+
+def shingles(record):
+    # word pairs from name and description plus whole ingredient names
+    words = TOKEN_PATTERN.findall(f"{record.name} {record.description}".lower())
+    items = {f"{a} {b}" for a, b in zip(words, words[1:])}
+    items.update(words[:1])
+    items.update(f"ingredient:{ingredient.lower()}" for ingredient in record.ingredients)
+    return items
+
+
+def signature(items, num_hashes=NUM_HASHES):
+    # One-permutation MinHash: every shingle is hashed once and lands in one
+    # of num_hashes bins, each bin keeps its minimum. Empty bins borrow from
+    # the next filled bin so short recipes still get a full signature.
+    bins = [None] * num_hashes
+    for item in items:
+        value = hash(item) & 0xFFFFFFFFFFFFFFFF
+        index = value % num_hashes
+        value //= num_hashes
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return None
+    for index in range(num_hashes):
+        offset = 1
+        while bins[index] is None:
+            borrowed = bins[(index + offset) % num_hashes]
+            if borrowed is not None:
+                bins[index] = borrowed + offset
+            offset += 1
+    return tuple(bins)
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    # Locality-sensitive hashing over MinHash signatures. Records only get
+    # compared when at least one band of their signatures is identical, so
+    # finding duplicates never needs all n^2 pairs.
+    def __init__(self, records=(), num_hashes=NUM_HASHES, bands=BANDS, threshold=THRESHOLD):
+        self.num_hashes = num_hashes
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.threshold = threshold
+        self._signatures = {}
+        # one dict per band: band hash -> recipe ids. Dicts keep insertion
+        # order and remove in O(1)
+        self._bands = [{} for _ in range(bands)]
+        # Pasted copies share their source's signature and are not put in the
+        # bands: primary id -> {copy id: None}, and copy id -> primary id
+        self._copies = {}
+        self._primary = {}
+        self.stale = False
+        self.rebuild(records)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def rebuild(self, records):
+        self.clear()
+        for record in records:
+            self.add(record)
+        self.stale = False
+
+    def clear(self):
+        self._signatures.clear()
+        self._copies.clear()
+        self._primary.clear()
+        for buckets in self._bands:
+            buckets.clear()
+
+    def add(self, record):
+        recipe_id = record.recipe_id
+        if recipe_id in self._signatures:
+            self.remove(recipe_id)
+        record_signature = signature(shingles(record), self.num_hashes)
+        if record_signature is not None:
+            self._insert(recipe_id, record_signature)
+
+    def copy(self, source_id, record):
+        # record has the same text as source_id, reuse its signature
+        record_signature = self._signatures.get(source_id)
+        if record_signature is None:
+            self.add(record)
+            return
+        recipe_id = record.recipe_id
+        if recipe_id in self._signatures:
+            self.remove(recipe_id)
+        primary = self._primary.get(source_id, source_id)
+        self._signatures[recipe_id] = record_signature
+        self._copies.setdefault(primary, {})[recipe_id] = None
+        self._primary[recipe_id] = primary
+
+    def update(self, record):
+        self.add(record)
+
+    def remove(self, recipe_id):
+        record_signature = self._signatures.pop(recipe_id, None)
+        if record_signature is None:
+            return
+        primary = self._primary.pop(recipe_id, None)
+        if primary is not None:
+            copies = self._copies[primary]
+            del copies[recipe_id]
+            if not copies:
+                del self._copies[primary]
+            return
+        successor = None
+        copies = self._copies.pop(recipe_id, None)
+        if copies:
+            # the first copy takes the removed record's place in the bands
+            successor = next(iter(copies))
+            del copies[successor]
+            del self._primary[successor]
+            if copies:
+                self._copies[successor] = copies
+                for copy_id in copies:
+                    self._primary[copy_id] = successor
+        for buckets, key in zip(self._bands, self._band_keys(record_signature)):
+            bucket = buckets[key]
+            del bucket[recipe_id]
+            if successor is not None:
+                bucket[successor] = None
+            elif not bucket:
+                del buckets[key]
+
+    def similar(self, record):
+        # (recipe_id, similarity) of indexed recipes that look like record
+        record_signature = signature(shingles(record), self.num_hashes)
+        if record_signature is None:
+            return []
+        candidates = set()
+        for buckets, key in zip(self._bands, self._band_keys(record_signature)):
+            bucket = buckets.get(key, ())
+            if len(bucket) <= MAX_BUCKET:
+                candidates.update(bucket)
+        for primary in [i for i in candidates if i in self._copies]:
+            candidates.update(self._copies[primary])
+        candidates.discard(record.recipe_id)
+        found = []
+        for recipe_id in candidates:
+            score = similarity(record_signature, self._signatures[recipe_id])
+            if score >= self.threshold:
+                found.append((recipe_id, score))
+        return sorted(found, key=lambda item: item[1], reverse=True)
+
+    def clusters(self):
+        # Groups of two or more recipe ids, linked through similar pairs
+        parent = {}
+
+        def find(recipe_id):
+            root = recipe_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while recipe_id != root:
+                parent[recipe_id], recipe_id = root, parent.get(recipe_id, recipe_id)
+            return root
+
+        checked = set()
+        for bucket in (bucket for buckets in self._bands for bucket in buckets.values()):
+            if len(bucket) < 2 or len(bucket) > MAX_BUCKET:
+                continue
+            members = list(bucket)
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pair = (first, second) if first < second else (second, first)
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    if similarity(self._signatures[first], self._signatures[second]) >= self.threshold:
+                        parent.setdefault(first, first)
+                        parent.setdefault(second, second)
+                        parent[find(first)] = find(second)
+
+        # copies are identical to their primary
+        for primary, copies in self._copies.items():
+            parent.setdefault(primary, primary)
+            for copy_id in copies:
+                parent.setdefault(copy_id, copy_id)
+                parent[find(copy_id)] = find(primary)
+
+        groups = {}
+        for recipe_id in parent:
+            groups.setdefault(find(recipe_id), []).append(recipe_id)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    def _insert(self, recipe_id, record_signature):
+        self._signatures[recipe_id] = record_signature
+        for buckets, key in zip(self._bands, self._band_keys(record_signature)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {recipe_id: None}
+            else:
+                bucket[recipe_id] = None
+
+    def _band_keys(self, record_signature):
+        rows = self.rows
+        return [hash(record_signature[start:start + rows]) for start in range(0, rows * self.bands, rows)]
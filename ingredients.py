@@ -0,0 +1,59 @@
+DEFAULT_INGREDIENTS = [
+    "Salt", "Pepper", "Sugar", "Flour", "Butter", "Eggs", "Milk",
+    "Onion", "Garlic", "Tomato", "Basil", "Oregano", "Parsley", "Thyme",
+    "Lemon", "Lime", "Chili", "Cinnamon", "Vanilla", "Honey",
+    "Ginger", "Soy Sauce", "Vinegar", "Mustard", "Mayonnaise", "Paprika",
+    "Cumin", "Coriander", "Sesame Seeds", "Coconut Milk", "Peanut Butter",
+    "Cocoa Powder", "Maple Syrup", "Worcestershire Sauce", "Fish Sauce", "Tahini",
+    "Red Wine", "White Wine", "Rice Vinegar", "Balsamic Vinegar", "Apple Cider Vinegar"
+]
+
+
+class IngredientCatalog:
+    # Ordered list of ingredient names, each interned to a small integer id.
+    # A recipe's ingredients become a bitmask with bit i set for ingredient i.
+    def __init__(self, names=()):
+        self._names = []
+        self._ids = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __getitem__(self, ingredient_id):
+        return self._names[ingredient_id]
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def add(self, name):
+        ingredient_id = self._ids.get(name)
+        if ingredient_id is None:
+            ingredient_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return ingredient_id
+
+    # keeps list-style callers working
+    append = add
+
+    def index(self, name):
+        return self._ids[name]
+
+    def intern(self, names):
+        # the catalog's own str objects are shared by every recipe using them
+        return [self._names[self.add(name)] for name in names]
+
+    def mask(self, names):
+        mask = 0
+        for name in names:
+            ingredient_id = self._ids.get(name)
+            if ingredient_id is not None:
+                mask |= 1 << ingredient_id
+        return mask
+
+    def names(self, mask):
+        return [name for ingredient_id, name in enumerate(self._names) if mask >> ingredient_id & 1]
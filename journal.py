@@ -0,0 +1,163 @@
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+
+from transfer import record_to_dict
+
+UNDO_LIMIT = 100
+
+
+def journal_path(database_path):
+    # not "-journal", that name belongs to SQLite's own rollback journal
+    return database_path + ".journal"
+
+
+def inverse(change):
+    # the change that takes the library back to where it was before change
+    kind, data = change
+    if kind == "add":
+        return "remove", data
+    if kind == "remove":
+        return "add", data
+    if kind == "clear":
+        return "restore", data
+    if kind == "restore":
+        return "clear", data
+    if kind == "update":
+        recipe_id, before, after = data
+        return "update", (recipe_id, after, before)
+    return "group", [inverse(part) for part in reversed(data)]
+
+
+def log_entries(change):
+    # JSON lines describing what change did, the shape replay() reads back
+    kind, data = change
+    if kind == "add":
+        yield {"op": "add", "records": [record_to_dict(record) for record in data]}
+    elif kind == "remove":
+        yield {"op": "remove", "ids": [record.recipe_id for record in data]}
+    elif kind == "update":
+        recipe_id, _, after = data
+        yield {"op": "update", "id": recipe_id, "fields": after}
+    elif kind == "clear":
+        yield {"op": "clear"}
+    elif kind == "restore":
+        yield {"op": "add", "records": [record_to_dict(record) for record in data]}
+    else:
+        for part in data:
+            yield from log_entries(part)
+
+
+class Journal:
+    # Undo/redo history of record changes. A change holds references to the
+    # records it added or removed and only the fields an edit replaced, so
+    # undoing "Delete All" keeps the existing records alive, no copies.
+    #
+    # With a log file attached every change is appended and synced to disk
+    # before the caller goes on: the log is the write-ahead log of everything
+    # not yet saved and replaying it costs only the changes since the last save.
+    def __init__(self, limit=UNDO_LIMIT):
+        self._undo = deque(maxlen=limit)
+        self._redo = []
+        self._group = None
+        self._log = None
+        self._log_path = None
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def record(self, change):
+        if self._group is not None:
+            self._group.append(change)
+            return
+        self._undo.append(change)
+        self._redo.clear()
+        self._write(change)
+
+    @contextmanager
+    def group(self):
+        # everything recorded inside is undone in one step and logged in one write
+        if self._group is not None:
+            yield
+            return
+        self._group = []
+        try:
+            yield
+        finally:
+            changes, self._group = self._group, None
+            if changes:
+                self.record(changes[0] if len(changes) == 1 else ("group", changes))
+
+    def undo(self):
+        # Returns the change to apply, the caller makes it happen
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        self._redo.append(change)
+        change = inverse(change)
+        self._write(change)
+        return change
+
+    def redo(self):
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        self._undo.append(change)
+        self._write(change)
+        return change
+
+    def clear_history(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def open_log(self, path):
+        # the file is created by the first change, reading leaves nothing behind
+        self.close_log()
+        self._log_path = path
+
+    def close_log(self, discard=False):
+        if discard:
+            self.truncate_log()
+        self._close_file()
+        self._log_path = None
+
+    def truncate_log(self):
+        # called once the changes are safely in the database, the next
+        # change starts a new file
+        self._close_file()
+        if self._log_path is not None and os.path.exists(self._log_path):
+            os.remove(self._log_path)
+
+    def _close_file(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write(self, change):
+        if self._log_path is None:
+            return
+        if self._log is None:
+            self._log = open(self._log_path, "a", encoding="utf-8")
+        self._log.write("".join(json.dumps(entry) + "\n" for entry in log_entries(change)))
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+
+def replay(path):
+    # Yields the logged entries in order. A crash can leave the last line
+    # half written, that change never completed and is skipped.
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            yield entry
@@ -1,68 +1,143 @@
 from tkinter import *
 from tkinter import ttk, messagebox, filedialog
 import tkinter.scrolledtext as tkscrolled
-from PIL import Image, ImageTk
 import os
-from ttkthemes import ThemedStyle
-
-class RecipeRecord:
-    def __init__(self, recipe_id, name, cooking_time, origin, description, ingredients=None, image_path=''):
-        self.recipe_id = recipe_id
-        self.name = name
-        self.cooking_time = cooking_time
-        self.origin = origin
-        self.description = description
-        self.ingredients = ingredients if ingredients else []
-        self.image_path = image_path
-        
-    def is_valid(self):
-        if not self.name or not self.cooking_time.isdigit() or not self.origin or not self.description:
-            return False
-        return True
+import sqlite3
+import sys
+import time
+from core import RecipeLibrary
+from profiling import profiler
+from records import RecipeRecord, parse_cooking_time
+from transfer import FILETYPES, BackgroundTask, read_ingredients, read_records, write_ingredients, write_records
+from treeview_sync import TreeviewSync, VirtualTreeview
+
+VIRTUAL_LIST_THRESHOLD = 10000
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_INDEX_CHUNK = 2000
+DATABASE_FILETYPES = (("recipe database", "*.db"), ("all files", "*.*"))
 
 class MainApp:
     def __init__(self):
         self.root = Tk()
         self.root.title("Recipe Database")
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
         self.root.resizable(width=False, height=False)
         self.app = Frame(self.root)
         self._initTreeView()
         self._initNotebookMenu()
         self._initMenu()
         self.selected_record = None
-        self.records = []
-        self.ingredients = [
-        "Salt", "Pepper", "Sugar", "Flour", "Butter", "Eggs", "Milk",
-        "Onion", "Garlic", "Tomato", "Basil", "Oregano", "Parsley", "Thyme",
-        "Lemon", "Lime", "Chili", "Cinnamon", "Vanilla", "Honey",
-        "Ginger", "Soy Sauce", "Vinegar", "Mustard", "Mayonnaise", "Paprika",
-        "Cumin", "Coriander", "Sesame Seeds", "Coconut Milk", "Peanut Butter",
-        "Cocoa Powder", "Maple Syrup", "Worcestershire Sauce", "Fish Sauce", "Tahini",
-        "Red Wine", "White Wine", "Rice Vinegar", "Balsamic Vinegar", "Apple Cider Vinegar"
-        ]
+        self.selected_records = []
+        self.library = RecipeLibrary()
+        self.ingredients = self.library.ingredients
+        self.records = self.library.records
+        self.ingredient_filter = None
+        self._indexing = None
         self.app.pack(pady=25, padx=25)
+        # Pillow and ttkthemes are only loaded once a window is actually built
+        from ttkthemes import ThemedStyle
+        from thumbnails import ThumbnailDiskCache, ThumbnailService
         self.style = ThemedStyle(self.root)
         self.style.set_theme("breeze")
         self.image_path = None
+        try:
+            disk_cache = ThumbnailDiskCache()
+        except OSError as e:
+            # e.g. a read-only home directory, thumbnails are then decoded every time
+            print(f"Thumbnail cache disabled: {e}")
+            disk_cache = None
+        self.thumbnails = ThumbnailService(self.root, disk_cache=disk_cache)
 
     def _initTreeView(self):
+        self.search_frame = ttk.Frame(self.app)
+        self.search_var = StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        self._search_job = None
+        search_label = ttk.Label(self.search_frame, text="Search")
+        search_label.pack(side=LEFT, padx=(0, 5))
+        self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var, width=40)
+        self.search_entry.pack(side=LEFT, fill=X, expand=True)
+        self.search_frame.pack(side=TOP, fill=X, pady=(0, 10))
+
         self.main_treeview = ttk.Treeview(self.app, columns=("id", "name", "cooking_time", "origin"), show='headings')
-        self.main_treeview.heading("id", text="ID")
-        self.main_treeview.heading("name", text="Name")
-        self.main_treeview.heading("cooking_time", text="Cooking Time")
-        self.main_treeview.heading("origin", text="Origin")
+        self.column_titles = {"id": "ID", "name": "Name", "cooking_time": "Cooking Time", "origin": "Origin"}
+        for column, title in self.column_titles.items():
+            self.main_treeview.heading(column, text=title, command=lambda column=column: self.sort_by_column(column))
+        self.sort_column = None
+        self.sort_descending = False
+        self.column_filter = None
 
         for col in self.main_treeview['columns']:
             self.main_treeview.column(col, width=100)
 
+        self.tree_scrollbar = ttk.Scrollbar(self.app, orient=VERTICAL, command=self.main_treeview.yview)
+        self.main_treeview.configure(yscrollcommand=self.tree_scrollbar.set)
+        self.tree_sync = TreeviewSync(self.main_treeview)
+        self.virtual_list = BooleanVar(value=False)
+
         self.main_treeview.bind("<Double-1>", self.item_clicked)
         self.main_treeview.bind("<Button-3>", self.on_right_click)
-        self.main_treeview.pack(side=RIGHT, fill=BOTH, padx=(0, 20))
+        self.tree_scrollbar.pack(side=RIGHT, fill=Y, padx=(0, 20))
+        self.main_treeview.pack(side=RIGHT, fill=BOTH)
         
         # Create a popup
         self.popup_menu = Menu(self.root, tearoff=0)
         self.popup_menu.add_command(label="Delete", command=self.delete_record)
 
+    def on_search_changed(self, *args):
+        # Debounce keystrokes, the query runs once typing pauses
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        self._add_records()
+
+    def _index_records(self, chunks=None):
+        # Index a lazily opened database in chunks between Tk events. A newer
+        # run, e.g. after opening another file, makes an older one stop.
+        if chunks is None:
+            chunks = self._indexing = self.library.index_chunks(SEARCH_INDEX_CHUNK)
+        elif chunks is not self._indexing:
+            chunks.close()
+            return
+        for _ in chunks:
+            self.root.after(1, self._index_records, chunks)
+            return
+        self._indexing = None
+        if self.search_var.get().strip():
+            self._add_records()
+
+    def set_virtual_list(self, enabled):
+        if enabled == isinstance(self.tree_sync, VirtualTreeview):
+            return
+        if enabled:
+            # Only the visible window of rows is kept in Tk, the scrollbar maps to the store
+            self.tree_sync.clear()
+            self.main_treeview.configure(yscrollcommand='')
+            self.tree_sync = VirtualTreeview(self.main_treeview, self.tree_scrollbar, self.records.get_many)
+        else:
+            self.tree_sync.detach()
+            self.tree_scrollbar.config(command=self.main_treeview.yview)
+            self.main_treeview.configure(yscrollcommand=self.tree_scrollbar.set)
+            self.tree_sync = TreeviewSync(self.main_treeview)
+        self.virtual_list.set(enabled)
+        self._add_records()
+
+    def sort_by_column(self, column):
+        # first click sorts ascending, the next one flips the direction
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            if self.sort_column is not None:
+                self.main_treeview.heading(self.sort_column, text=self.column_titles[self.sort_column])
+            self.sort_column = column
+            self.sort_descending = False
+        arrow = " \u25bc" if self.sort_descending else " \u25b2"
+        self.main_treeview.heading(column, text=self.column_titles[column] + arrow)
+        self._add_records()
+
     def on_right_click(self, event):
         row_id = self.main_treeview.identify_row(event.y)
         if row_id:
@@ -76,9 +151,9 @@ class MainApp:
             # Confirm deletion
             confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this record?")
             if confirm:
-                # Remove the record from the list and refresh the Treeview
-                self.records = [record for record in self.records if record.recipe_id != record_id]
-                self._add_records()
+                # Remove the record from the store and its row from the Treeview
+                self.library.remove(record_id)
+                self.tree_sync.remove(record_id)
 
     def item_clicked(self, event):
         selected_item = self.main_treeview.selection()
@@ -86,14 +161,15 @@ class MainApp:
             # Get the record ID of the selected item
             record_id = self.main_treeview.item(selected_item)['values'][0]
             # Find the corresponding record by ID
-            record = next((record for record in self.records if record.recipe_id == record_id), None)
+            record = self.records.get(record_id)
             if record:
                 self.show_details_window(record)
 
+    @profiler.timed("show_details_window")
     def show_details_window(self, record):
         details_window = Toplevel(self.root)
         details_window.title(f"Details of {record.name}")
-        details_window.geometry("600x405")
+        details_window.geometry("600x440")
         
         details_window.lift()
 
@@ -125,23 +201,33 @@ class MainApp:
         description_text.insert(END, record.description)
         
         # Function to update image
+        def record_gone():
+            # the recipe may have been deleted, or another database opened, meanwhile
+            if self.records.get(record.recipe_id) is record:
+                return False
+            details_window.destroy()
+            messagebox.showerror("Recipe Not Found", "This recipe is no longer in the list.")
+            return True
+
         def update_image():
             new_image_path = filedialog.askopenfilename(initialdir=os.getcwd(), title="Select file", filetypes=(("jpeg files", "*.jpg"), ("png files", "*.png"), ("all files", "*.*")))
-            if new_image_path:
-                record.image_path = new_image_path
+            if new_image_path and not record_gone():
+                # through the library so the change is saved, logged and undoable
+                self.library.update(record, image_path=new_image_path)
                 update_image_display(new_image_path)
 
-        # Function to display image
+        # Function to display image, decoding happens off the Tk thread
         def update_image_display(image_path):
-            try:
-                image = Image.open(image_path)
-                image = image.resize((250, 250), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(image)
+            with profiler.span("update_image_display"):
+                requested = time.perf_counter()
+                self.thumbnails.request(image_path, lambda photo: show_thumbnail(photo, requested))
+
+        def show_thumbnail(photo, requested):
+            # time until the picture is on screen, decoding included
+            profiler.record("image_display", time.perf_counter() - requested)
+            if image_label.winfo_exists():
                 image_label.configure(image=photo)
                 image_label.image = photo
-                details_window.update_idletasks()
-            except Exception as e:
-                print(f"Error loading image: {e}")
 
         # Image display and update button
         image_label = Label(right_frame)
@@ -157,14 +243,12 @@ class MainApp:
             ingredients_window.title("Select Ingredients")
 
             num_columns = 3 
+            # save flags status
+            var_list = [IntVar(value=ingredient in chosen_ingredients) for ingredient in self.ingredients]
 
             def add_selected_ingredients():
-                selected_ingredients = [self.ingredients[i] for i in range(len(self.ingredients)) if var_list[i].get() == 1]
-                start_index = description_text.search("\nIngredients:", "1.0", END)
-                if start_index:
-            # deleting all symbols from ingredients start
-                    description_text.delete(start_index, END) 
-                description_text.insert(END, "\n\nIngredients:\n" + "\n".join(selected_ingredients))
+                chosen_ingredients[:] = [self.ingredients[i] for i in range(len(self.ingredients)) if var_list[i].get() == 1]
+                ingredients_label.config(text=", ".join(chosen_ingredients))
                 ingredients_window.destroy()
 
             for i, ingredient in enumerate(self.ingredients):
@@ -180,24 +264,40 @@ class MainApp:
             close_button = Button(ingredients_window, text="Exit", command=ingredients_window.destroy, width=10)
             close_button.grid(row=row + 2, column=0, columnspan=num_columns, pady=10)
 
-        # save flags status
-        var_list = [IntVar() for _ in range(len(self.ingredients))]
+        # ingredients are kept as a list on the record, not spliced into the description
+        chosen_ingredients = list(record.ingredients)
 
         ingredients_button = Button(left_frame, text="Add Ingredients", command=select_ingredients)
         ingredients_button.grid(row=8, column=0, pady=(10, 0))
+        ingredients_label = Label(left_frame, text=", ".join(chosen_ingredients), wraplength=250, justify=LEFT)
+        ingredients_label.grid(row=9, column=0, sticky='w', pady=(5, 0))
 
         # Save Changes Button
         def save_changes():
-            record.name = name_entry.get()
-            record.cooking_time = cooking_time_entry.get()
-            record.origin = origin_entry.get()
-            record.description = description_text.get("1.0", "end-1c")
-            self._add_records()
+            if record_gone():
+                return
+            cooking_time = parse_cooking_time(cooking_time_entry.get())
+            if cooking_time is None:
+                messagebox.showerror("Invalid Record", "Please check the input values.")
+                return
+            try:
+                self.library.update(
+                    record,
+                    name=name_entry.get(),
+                    cooking_time=cooking_time,
+                    origin=origin_entry.get(),
+                    description=description_text.get("1.0", "end-1c"),
+                    ingredients=list(chosen_ingredients),
+                )
+            except ValueError:
+                messagebox.showerror("Invalid Record", "Please check the input values.")
+                return
+            self._show_changed([record])
             details_window.destroy()
             messagebox.showinfo("Update Successful", "The recipe data has been updated successfully.")
 
         save_button = Button(left_frame, text="Save Changes", command=save_changes)
-        save_button.grid(row=9, column=0, columnspan=2, pady=(10, 0))
+        save_button.grid(row=10, column=0, columnspan=2, pady=(10, 0))
 
     def _initNotebookMenu(self):
         self.notebook = ttk.Notebook(self.app)
@@ -258,77 +358,249 @@ class MainApp:
         self.settings_menu = Menu(self.top_menu_bar, tearoff=0)
 
         self.settings_menu.add_command(label="Configuration", command=self.open_config_window)  # Add Configuration option
-        self.settings_menu.add_command(label="Quit", command=self.root.quit)
+        self.settings_menu.add_command(label="Quit", command=self.quit)
 
         self.top_menu_bar.add_cascade(label="Settings", menu=self.settings_menu)
         self.root.config(menu=self.top_menu_bar)
         
         file_menu = Menu(self.top_menu_bar, tearoff=0)
-        file_menu.add_command(label="New")
-        file_menu.add_command(label="Open")
+        file_menu.add_command(label="New", command=self.new_database)
+        file_menu.add_command(label="Open", command=self.open_database)
         file_menu.add_separator()
-        file_menu.add_command(label="Save")
-        file_menu.add_command(label="Save As")
+        file_menu.add_command(label="Save", command=self.save_database)
+        file_menu.add_command(label="Save As", command=self.save_database_as)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.quit)
 
         edit_menu = Menu(self.top_menu_bar, tearoff=0)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        edit_menu.add_separator()
         edit_menu.add_command(label="Copy", command=self.copy_record)
         edit_menu.add_command(label="Paste", command=self.paste_record)
         edit_menu.add_separator()
         edit_menu.add_command(label="Delete All", command=self.delete_all_items)
+        edit_menu.add_command(label="Find Duplicates", command=self.open_duplicates_window)
         
         selection_menu = Menu(self.top_menu_bar, tearoff=0)
         selection_menu.add_command(label="Select All", command=self.select_all_records)
         selection_menu.add_command(label="Deselect All", command=self.deselect_all_records)
+        selection_menu.add_separator()
+        selection_menu.add_command(label="Filter by Ingredients", command=self.open_ingredient_filter_window)
+        selection_menu.add_command(label="Filter by Columns", command=self.open_column_filter_window)
         
         self.top_menu_bar.add_cascade(label="File", menu=file_menu)
         self.top_menu_bar.add_cascade(label="Edit", menu=edit_menu)
         self.top_menu_bar.add_cascade(label="Selection", menu=selection_menu)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
         
+    def undo(self):
+        # the view is synced against the store, only changed rows touch Tk
+        if self.library.undo():
+            self._after_history_change()
+
+    def redo(self):
+        if self.library.redo():
+            self._after_history_change()
+
+    def _after_history_change(self):
+        # undoing Delete All leaves the indexes to be rebuilt
+        if self.library.search_index.stale:
+            self._index_records()
+        self._add_records()
+
+    def _confirm_close(self, title):
+        # True once the current recipes may go: saved, or the user chose to discard them
+        if not self.library.dirty:
+            return True
+        answer = messagebox.askyesnocancel(title, "Save changes to the current recipes?")
+        if answer is None:
+            return False
+        if answer:
+            self.save_database()
+            # Save As may have been cancelled
+            return not self.library.dirty
+        self.library.discard_changes()
+        return True
+
+    def quit(self):
+        if self._confirm_close("Exit"):
+            self.root.quit()
+
+    def new_database(self):
+        if not self._confirm_close("New Database"):
+            return
+        self.library.new()
+        self.root.title("Recipe Database")
+        self._add_records()
+
+    def open_database(self):
+        path = filedialog.askopenfilename(initialdir=os.getcwd(), title="Open database", filetypes=DATABASE_FILETYPES)
+        # asked only once a file was chosen, a cancelled dialog must not discard anything
+        if not path or not self._confirm_close("Open Database"):
+            return
+        # Only recipe ids are read here, rows are fetched as the view needs them
+        try:
+            self.library.open(path)
+        except sqlite3.DatabaseError as e:
+            messagebox.showerror("Open Database", f"{os.path.basename(path)} is not a recipe database: {e}")
+            return
+        self._index_records()
+        self.root.title(f"Recipe Database - {os.path.basename(path)}")
+        self.set_virtual_list(len(self.records) >= VIRTUAL_LIST_THRESHOLD)
+        self._add_records()
+
+    def save_database(self):
+        if self.library.storage is None:
+            self.save_database_as()
+            return
+        self.library.save()
+
+    def save_database_as(self):
+        path = filedialog.asksaveasfilename(initialdir=os.getcwd(), title="Save database", defaultextension=".db", filetypes=DATABASE_FILETYPES)
+        if not path:
+            return
+        self.library.save_as(path)
+        self.root.title(f"Recipe Database - {os.path.basename(path)}")
+
+    def open_ingredient_filter_window(self):
+        filter_window = Toplevel(self.root)
+        filter_window.title("Filter by Ingredients")
+
+        Label(filter_window, text="With:").grid(row=0, column=0, sticky='w', padx=10, pady=(10, 0))
+        Label(filter_window, text="Without:").grid(row=0, column=1, sticky='w', padx=10, pady=(10, 0))
+        include_list = Listbox(filter_window, selectmode=MULTIPLE, exportselection=False, height=12)
+        exclude_list = Listbox(filter_window, selectmode=MULTIPLE, exportselection=False, height=12)
+        for ingredient in self.ingredients:
+            include_list.insert(END, ingredient)
+            exclude_list.insert(END, ingredient)
+        include_list.grid(row=1, column=0, padx=10)
+        exclude_list.grid(row=1, column=1, padx=10)
+
+        # "can make" shows recipes using nothing but the ingredients in the first list
+        makeable = BooleanVar(value=False)
+        ttk.Checkbutton(filter_window, text="Only recipes I can make with these", variable=makeable).grid(row=2, column=0, columnspan=2, sticky='w', padx=10, pady=5)
+
+        def apply_filter():
+            include = [include_list.get(i) for i in include_list.curselection()]
+            exclude = [exclude_list.get(i) for i in exclude_list.curselection()]
+            self.ingredient_filter = (include, exclude, makeable.get()) if include or exclude or makeable.get() else None
+            self._add_records()
+
+        def clear_filter():
+            self.ingredient_filter = None
+            self._add_records()
+            filter_window.destroy()
+
+        Button(filter_window, text="Apply", command=apply_filter, width=10).grid(row=3, column=0, pady=10)
+        Button(filter_window, text="Clear", command=clear_filter, width=10).grid(row=3, column=1, pady=10)
+
+    def open_column_filter_window(self):
+        filter_window = Toplevel(self.root)
+        filter_window.title("Filter by Columns")
+        column_filter = self.column_filter or {}
+
+        Label(filter_window, text="Origin:").grid(row=0, column=0, sticky='w', padx=10, pady=(10, 5))
+        origin_combobox = ttk.Combobox(filter_window, values=["Any"] + self.records.origins(), state="readonly", width=21)
+        origin_combobox.set(column_filter.get("origin") or "Any")
+        origin_combobox.grid(row=0, column=1, columnspan=3, sticky='w', padx=10, pady=(10, 5))
+
+        low, high = column_filter.get("cooking_time") or ('', '')
+        Label(filter_window, text="Cooking Time:").grid(row=1, column=0, sticky='w', padx=10, pady=5)
+        low_entry = ttk.Entry(filter_window, width=8)
+        low_entry.insert(0, low)
+        low_entry.grid(row=1, column=1, padx=(10, 0), pady=5)
+        Label(filter_window, text="to").grid(row=1, column=2, padx=5)
+        high_entry = ttk.Entry(filter_window, width=8)
+        high_entry.insert(0, high)
+        high_entry.grid(row=1, column=3, padx=(0, 10), pady=5)
+
+        def apply_filter():
+            low, high = parse_cooking_time(low_entry.get() or 0), parse_cooking_time(high_entry.get() or sys.maxsize)
+            if low is None or high is None:
+                messagebox.showerror("Invalid Filter", "Cooking times must be whole minutes.", parent=filter_window)
+                return
+            column_filter = {}
+            if origin_combobox.get() != "Any":
+                column_filter["origin"] = origin_combobox.get()
+            if low_entry.get() or high_entry.get():
+                column_filter["cooking_time"] = (low, high)
+            self.column_filter = column_filter or None
+            self._add_records()
+
+        def clear_filter():
+            self.column_filter = None
+            self._add_records()
+            filter_window.destroy()
+
+        Button(filter_window, text="Apply", command=apply_filter, width=10).grid(row=2, column=0, columnspan=2, pady=10)
+        Button(filter_window, text="Clear", command=clear_filter, width=10).grid(row=2, column=2, columnspan=2, pady=10)
+
     def delete_all_items(self):
         confirm = messagebox.askyesno("Confirm Delete All", "Are you sure you want to delete all records?")
         if confirm:
-            self.records = []
-            self._add_records()    
+            self.library.clear()
+            self.tree_sync.clear()    
             
+    def open_duplicates_window(self):
+        clusters = self.library.find_duplicates()
+        if not clusters:
+            messagebox.showinfo("Find Duplicates", "No similar recipes were found.")
+            return
+        duplicates_window = Toplevel(self.root)
+        duplicates_window.title("Find Duplicates")
+
+        # one parent row per group, the first recipe in a group is kept
+        duplicates_tree = ttk.Treeview(duplicates_window, columns=("ID", "Name", "Origin"), height=15)
+        duplicates_tree.heading("#0", text="Group")
+        duplicates_tree.heading("ID", text="ID")
+        duplicates_tree.heading("Name", text="Name")
+        duplicates_tree.heading("Origin", text="Origin")
+        duplicates_tree.column("#0", width=80)
+        duplicates_tree.column("ID", width=60)
+        for number, cluster in enumerate(clusters, 1):
+            group = duplicates_tree.insert('', END, text=f"Group {number}", open=True)
+            for record in self.records.get_many(cluster):
+                duplicates_tree.insert(group, END, values=(record.recipe_id, record.name, record.origin))
+        duplicates_tree.grid(row=0, column=0, columnspan=2, padx=10, pady=10)
+
+        def delete_duplicates():
+            if not messagebox.askyesno("Delete Duplicates", "Keep the first recipe of every group and delete the rest?", parent=duplicates_window):
+                return
+            removed = [recipe_id for cluster in clusters for recipe_id in cluster[1:]]
+            with self.library.journal.group():
+                for recipe_id in removed:
+                    self.library.remove(recipe_id)
+            self.tree_sync.remove_many(removed)
+            duplicates_window.destroy()
+
+        Button(duplicates_window, text="Keep First, Delete Others", command=delete_duplicates, width=22).grid(row=1, column=0, pady=(0, 10))
+        Button(duplicates_window, text="Close", command=duplicates_window.destroy, width=10).grid(row=1, column=1, pady=(0, 10))
+
     def select_all_records(self):
-        for item in self.main_treeview.get_children():
-            self.main_treeview.selection_add(item)
+        self.tree_sync.select_all()
 
     def deselect_all_records(self):
-        for item in self.main_treeview.selection():
-            self.main_treeview.selection_remove(item)
+        self.tree_sync.select_none()
             
     def copy_record(self):
-        selected_items = self.main_treeview.selection()
-        if selected_items:
-            self.selected_records = []
-            for item in selected_items:
-                record_id = self.main_treeview.item(item)['values'][0]
-                record = next((record for record in self.records if record.recipe_id == record_id), None)
-                if record:
-                    self.selected_records.append(record)
+        # iids are recipe ids, the store resolves the whole selection in one call
+        selected_ids = self.tree_sync.selected_ids()
+        if selected_ids:
+            self.selected_records = self.records.get_many(selected_ids)
 
     def paste_record(self):
         if self.selected_records:
-            for selected_record in self.selected_records:
-                new_record = RecipeRecord(
-                    recipe_id=len(self.records) + 1,
-                    name=selected_record.name,
-                    cooking_time=selected_record.cooking_time,
-                    origin=selected_record.origin,
-                    description=selected_record.description,
-                    image_path=selected_record.image_path
-                )
-                self.records.append(new_record)
-            self._add_records()
+            if len(self.records) + len(self.selected_records) >= VIRTUAL_LIST_THRESHOLD:
+                self.set_virtual_list(True)
+            self._show_changed(self.library.paste(self.selected_records))
             self.selected_records = []
 
     def open_config_window(self):
         config_window = Toplevel(self.root)
         config_window.title("Configuration")
-        config_window.geometry("400x300")
+        config_window.geometry("400x400")
 
         tab_control = ttk.Notebook(config_window)
 
@@ -351,26 +623,142 @@ class MainApp:
         self.theme_combobox.grid(column=1, row=0, sticky='W', padx=5, pady=5)
         self.theme_combobox.bind("<<ComboboxSelected>>", self.change_theme)
 
+        # Virtual list section
+        virtual_list_label = Label(settings_tab, text="Virtual List:", padx=5, pady=5)
+        virtual_list_label.grid(column=0, row=1, sticky='W')
+        virtual_list_check = ttk.Checkbutton(settings_tab, variable=self.virtual_list, command=lambda: self.set_virtual_list(self.virtual_list.get()))
+        virtual_list_check.grid(column=1, row=1, sticky='W', padx=5, pady=5)
+
         # Import File section
         import_file_label = Label(settings_tab, text="Import File:", padx=5, pady=5)
         import_file_label.grid(column=0, row=2, sticky='W')
-        import_file_button = Button(settings_tab, text="Import", width=20)
+        import_file_button = Button(settings_tab, text="Import", width=20, command=self.import_records)
         import_file_button.grid(column=1, row=2, sticky='W', padx=5, pady=5)
 
         # Export File section
         export_file_label = Label(settings_tab, text="Export File:", padx=5, pady=5)
         export_file_label.grid(column=0, row=3, sticky='W')
-        export_file_button = Button(settings_tab, text="Export", width=20)
+        export_file_button = Button(settings_tab, text="Export", width=20, command=self.export_records)
         export_file_button.grid(column=1, row=3, sticky='W', padx=5, pady=5)
 
         # Import Ingredients section
         import_ingredients_label = Label(settings_tab, text="Import Ingredients:", padx=5, pady=5)
         import_ingredients_label.grid(column=0, row=4, sticky='W')
-        import_ingredients_button = Button(settings_tab, text="Import Ingredients", width=20)
+        import_ingredients_button = Button(settings_tab, text="Import Ingredients", width=20, command=self.import_ingredients)
         import_ingredients_button.grid(column=1, row=4, sticky='W', padx=5, pady=5)
 
+        # Export Ingredients section
+        export_ingredients_label = Label(settings_tab, text="Export Ingredients:", padx=5, pady=5)
+        export_ingredients_label.grid(column=0, row=5, sticky='W')
+        export_ingredients_button = Button(settings_tab, text="Export Ingredients", width=20, command=self.export_ingredients)
+        export_ingredients_button.grid(column=1, row=5, sticky='W', padx=5, pady=5)
+
+        # Profiling section
+        profiling_label = Label(settings_tab, text="Profiling:", padx=5, pady=5)
+        profiling_label.grid(column=0, row=6, sticky='W')
+        self.profiling = BooleanVar(value=profiler.enabled)
+        profiling_check = ttk.Checkbutton(settings_tab, variable=self.profiling, command=lambda: setattr(profiler, "enabled", self.profiling.get()))
+        profiling_check.grid(column=1, row=6, sticky='W', padx=5, pady=5)
+        timings_button = Button(settings_tab, text="Show Timings", width=20, command=self.open_timings_window)
+        timings_button.grid(column=1, row=7, sticky='W', padx=5, pady=5)
+
         tab_control.pack(expand=1, fill="both")
 
+    def open_timings_window(self):
+        timings_window = Toplevel(self.root)
+        timings_window.title("Timings")
+        timings_window.geometry("700x450")
+
+        # Latency histograms per operation, in milliseconds
+        timings_text = tkscrolled.ScrolledText(timings_window, font=('Courier', 9), wrap=NONE)
+        timings_text.pack(expand=1, fill="both", padx=10, pady=(10, 5))
+
+        def refresh():
+            timings_text.configure(state=NORMAL)
+            timings_text.delete("1.0", END)
+            timings_text.insert(END, profiler.report())
+            timings_text.configure(state=DISABLED)
+
+        def reset():
+            profiler.reset()
+            refresh()
+
+        buttons = Frame(timings_window)
+        buttons.pack(pady=(0, 10))
+        Button(buttons, text="Refresh", command=refresh, width=10).pack(side=LEFT, padx=5)
+        Button(buttons, text="Reset", command=reset, width=10).pack(side=LEFT, padx=5)
+        refresh()
+
+    def import_records(self):
+        path = filedialog.askopenfilename(initialdir=os.getcwd(), title="Import recipes", filetypes=FILETYPES)
+        if path:
+            self._import_skipped = 0
+            self._run_transfer("Import", BackgroundTask(read_records(path)).start(), self._import_batch, self._import_summary)
+
+    def _import_batch(self, item):
+        batch, fraction = item
+        if len(self.records) + len(batch) >= VIRTUAL_LIST_THRESHOLD:
+            self.set_virtual_list(True)
+        added = self.library.add_many(batch)
+        self._import_skipped += len(batch) - len(added)
+        self._show_changed(added)
+        # pre-generate cached thumbnails so the first details view is cheap
+        self.thumbnails.warm_up(record.image_path for record in batch if record.image_path)
+        return fraction
+
+    def _import_summary(self):
+        if not self._import_skipped:
+            return "Import has finished successfully."
+        return f"Import has finished, {self._import_skipped} invalid recipes were skipped."
+
+    def export_records(self):
+        path = filedialog.asksaveasfilename(initialdir=os.getcwd(), title="Export recipes", defaultextension=".jsonl", filetypes=FILETYPES)
+        if path:
+            # rows are read on the worker from a snapshot, edits made during the export don't touch it
+            records = self.records.snapshot()
+            self._run_transfer("Export", BackgroundTask(write_records(path, records, len(self.records))).start(), lambda fraction: fraction)
+
+    def import_ingredients(self):
+        path = filedialog.askopenfilename(initialdir=os.getcwd(), title="Import ingredients", filetypes=(("text files", "*.txt"), ("CSV", "*.csv"), ("all files", "*.*")))
+        if path:
+            self._run_transfer("Import Ingredients", BackgroundTask(read_ingredients(path)).start(), self._import_ingredient_batch)
+
+    def export_ingredients(self):
+        path = filedialog.asksaveasfilename(initialdir=os.getcwd(), title="Export ingredients", defaultextension=".txt", filetypes=(("text files", "*.txt"), ("CSV", "*.csv"), ("all files", "*.*")))
+        if path:
+            names = list(self.ingredients)
+            self._run_transfer("Export Ingredients", BackgroundTask(write_ingredients(path, names, len(names))).start(), lambda fraction: fraction)
+
+    def _import_ingredient_batch(self, item):
+        names, fraction = item
+        for name in names:
+            self.ingredients.add(name)
+        return fraction
+
+    def _run_transfer(self, title, task, handle_item, summary=None):
+        progress_window = Toplevel(self.root)
+        progress_window.title(title)
+        progress_window.protocol("WM_DELETE_WINDOW", task.cancel)
+        progress_bar = ttk.Progressbar(progress_window, length=300, maximum=1.0)
+        progress_bar.pack(padx=20, pady=(20, 10))
+        cancel_button = Button(progress_window, text="Cancel", command=task.cancel, width=10)
+        cancel_button.pack(pady=(0, 15))
+
+        # Drain a few batches per tick so the mainloop keeps handling events
+        def poll():
+            for item in task.poll():
+                progress_bar['value'] = handle_item(item)
+            if not task.done:
+                self.root.after(50, poll)
+                return
+            progress_window.destroy()
+            if task.error:
+                messagebox.showerror(f"{title} Failed", str(task.error))
+            elif not task.cancelled.is_set():
+                messagebox.showinfo(f"{title} Finished", summary() if summary else f"{title} has finished successfully.")
+
+        poll()
+
     def change_theme(self, event):
         selected_theme = self.theme_combobox.get()
         self.style.set_theme(selected_theme)
@@ -386,8 +774,9 @@ class MainApp:
         license_label = Label(license_window, text=license_text, justify=LEFT, anchor="nw")
         license_label.pack(padx=10, pady=10)
 
+    @profiler.timed("add_record")
     def add_record(self):
-        recipe_id = 1 if len(self.main_treeview.get_children()) == 0 else int(self.main_treeview.item(self.main_treeview.get_children()[-1])['values'][0]) + 1
+        recipe_id = self.records.next_id()
         name = self.new_record_form.winfo_children()[1].get()
         cooking_time = self.new_record_form.winfo_children()[3].get()
         origin = self.new_record_form.winfo_children()[5].get()
@@ -400,9 +789,14 @@ class MainApp:
         if not new_record.is_valid():
             messagebox.showerror("Invalid Record", "Please check the input values.")
             return
-
-        self.records.append(new_record)
-        self._add_records()
+        similar = self.library.similar(new_record)
+        if similar:
+            match = self.records.get(similar[0][0])
+            if not messagebox.askyesno("Possible Duplicate", f"This looks like recipe {match.recipe_id} '{match.name}'. Add it anyway?"):
+                return
+
+        self.library.add(new_record)
+        self._show_changed([new_record])
         for entry in self.new_record_form.winfo_children():
             if isinstance(entry, ttk.Entry):
                 entry.delete(0, END)
@@ -411,11 +805,27 @@ class MainApp:
         
         self.image_path = None
 
+    def _show_changed(self, records):
+        # Added or edited rows go at the end or stay put, unless a search,
+        # filter or sort decides where they belong: then the query runs again
+        if self.sort_column or self.ingredient_filter or self.column_filter or self.search_var.get().strip():
+            self._add_records()
+        else:
+            self.tree_sync.upsert_many(records)
+
+    @profiler.timed("_add_records")
     def _add_records(self):
-        for i in self.main_treeview.get_children():
-            self.main_treeview.delete(i)
-        for record in self.records:
-            self.main_treeview.insert("", "end", values=(record.recipe_id, record.name, record.cooking_time, record.origin))
+        ids = self.library.query(
+            self.search_var.get(), *(self.ingredient_filter or ()),
+            **(self.column_filter or {}), sort_by=self.sort_column, descending=self.sort_descending,
+        )
+        if isinstance(self.tree_sync, VirtualTreeview):
+            # the virtual list only needs ids, records stay lazily loaded
+            self.tree_sync.sync_ids(self.records.ids() if ids is None else ids)
+        elif ids is not None:
+            self.tree_sync.sync(self.records.get_many(ids))
+        else:
+            self.tree_sync.sync(self.records)
 
     def add_image(self):
         self.image_path = filedialog.askopenfilename(initialdir=os.getcwd(), title="Select file", filetypes=(("jpeg files", "*.jpg"), ("all files", "*.*")))
@@ -423,5 +833,12 @@ class MainApp:
         
     def run(self):
         self.root.mainloop()
-app = MainApp()
-app.run()
+        self.library.close()
+        self.thumbnails.shutdown()
+        if profiler.enabled:
+            print(profiler.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    app = MainApp()
+    app.run()
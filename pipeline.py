@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 2000
+WHITESPACE = re.compile(r"\s+")
+# the fields normalize() may change, in the order _fields() sends them
+FIELDS = ("name", "origin", "description", "ingredients")
+ORIGIN_ALIASES = {
+    "usa": "USA",
+    "us": "USA",
+    "united states": "USA",
+    "uk": "United Kingdom",
+    "england": "United Kingdom",
+    "czech republic": "Czechia",
+    "none": "None",
+}
+
+# canonical ingredient names keyed by their folded form, set in each worker
+_ingredient_lookup = {}
+
+
+class RecordReport:
+    # record is the input record, left untouched. changes holds the fields
+    # normalizing would change, by name. duplicate_of is the input position
+    # of the first record with the same key.
+    def __init__(self, position, record, changes, errors, warnings, duplicate_of=None):
+        self.position = position
+        self.record = record
+        self.changes = changes
+        self.errors = errors
+        self.warnings = warnings
+        self.duplicate_of = duplicate_of
+
+    @property
+    def ok(self):
+        return not self.errors and self.duplicate_of is None
+
+
+def fold(text):
+    return WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def canonical_origin(origin):
+    origin = WHITESPACE.sub(" ", origin or '').strip()
+    return ORIGIN_ALIASES.get(origin.casefold(), origin.title() if origin.islower() else origin)
+
+
+def normalize(name, origin, description, ingredients, cooking_time):
+    # (normalized values by field, errors, warnings)
+    errors = []
+    warnings = []
+    name = WHITESPACE.sub(" ", name or '').strip()
+    origin = canonical_origin(origin)
+    description = (description or '').strip()
+    canonical_ingredients = []
+    for ingredient in ingredients:
+        canonical = _ingredient_lookup.get(fold(ingredient))
+        if canonical is None:
+            canonical = WHITESPACE.sub(" ", ingredient).strip()
+            warnings.append(f"unknown ingredient '{canonical}'")
+        if canonical and canonical not in canonical_ingredients:
+            canonical_ingredients.append(canonical)
+    if not name:
+        errors.append("name is empty")
+    if cooking_time is None:
+        errors.append("cooking time is not a number")
+    if not origin:
+        errors.append("origin is empty")
+    if not description:
+        errors.append("description is empty")
+    values = {"name": name, "origin": origin, "description": description, "ingredients": canonical_ingredients}
+    return values, errors, warnings
+
+
+def duplicate_key(name, origin, cooking_time, description, ingredients):
+    # Every stored field but the image, so clean only removes true copies;
+    # recipes that merely look alike are for NearDuplicateIndex to report.
+    # Hashed so a worker sends back 16 bytes instead of the recipe's text.
+    key = (fold(name), fold(origin), cooking_time, fold(description), tuple(sorted(fold(i) for i in ingredients)))
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).digest()
+
+
+def _init_worker(ingredient_names):
+    # The first spelling wins: the catalog starts with the default names and
+    # later holds every spelling imported records used, "basil" included
+    global _ingredient_lookup
+    _ingredient_lookup = {}
+    for name in ingredient_names:
+        _ingredient_lookup.setdefault(fold(name), name)
+
+
+def _fields(record):
+    # what a worker gets of a record, in normalize()'s argument order
+    return record.name, record.origin, record.description, record.ingredients, record.cooking_time
+
+
+def _process_chunk(rows):
+    # Only the fields normalizing changed travel back, most records have none
+    results = []
+    for row in rows:
+        values, errors, warnings = normalize(*row)
+        changes = {field: values[field] for field, original in zip(FIELDS, row) if values[field] != original}
+        key = None if errors else duplicate_key(
+            values["name"], values["origin"], row[4], values["description"], values["ingredients"],
+        )
+        results.append((changes, errors, warnings, key))
+    return results
+
+
+def _chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def clean_records(records, ingredient_names, workers=None, chunk_size=CHUNK_SIZE):
+    # Validates, normalizes and deduplicates records on a process pool and
+    # yields a RecordReport per input record, in input order. Only a few
+    # chunks per worker are in flight so any length of input streams through.
+    workers = workers or os.cpu_count() or 1
+    seen = {}
+    position = 0
+
+    def reports(chunk, results):
+        nonlocal position
+        for record, (changes, errors, warnings, key) in zip(chunk, results):
+            duplicate_of = None
+            if not errors:
+                duplicate_of = seen.setdefault(key, position)
+                if duplicate_of == position:
+                    duplicate_of = None
+            yield RecordReport(position, record, changes, errors, warnings, duplicate_of)
+            position += 1
+
+    if workers == 1:
+        _init_worker(ingredient_names)
+        for chunk in _chunks(records, chunk_size):
+            yield from reports(chunk, _process_chunk([_fields(record) for record in chunk]))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(list(ingredient_names),)) as executor:
+        # the records stay here, workers only get their fields
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append((chunk, executor.submit(_process_chunk, [_fields(record) for record in chunk])))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                yield from reports(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            yield from reports(chunk, future.result())
@@ -0,0 +1,101 @@
+import functools
+import math
+import os
+import time
+from contextlib import contextmanager
+
+# histogram buckets are powers of two in milliseconds, up to ~16 s
+BUCKETS_MS = [2 ** power for power in range(-4, 15)]
+BAR_WIDTH = 40
+
+
+class Profiler:
+    # Latency samples per operation name. Disabled it costs one attribute
+    # check per span, so the spans stay in the hot paths for good.
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._samples = {}
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        # decorator form of span()
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        # for operations that end in a callback rather than a return
+        if self.enabled:
+            self._samples.setdefault(name, []).append(seconds)
+
+    def reset(self):
+        self._samples.clear()
+
+    def names(self):
+        return sorted(self._samples)
+
+    def stats(self, name):
+        samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return None
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, math.ceil(fraction * len(samples)) - 1)] * 1000
+
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples) * 1000,
+            "p50": percentile(0.5),
+            "p90": percentile(0.9),
+            "p99": percentile(0.99),
+            "max": samples[-1] * 1000,
+        }
+
+    def histogram(self, name):
+        # [(upper bound in ms, count)] without the empty buckets at either end
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for seconds in self._samples.get(name, ()):
+            milliseconds = seconds * 1000
+            index = 0
+            while index < len(BUCKETS_MS) and milliseconds > BUCKETS_MS[index]:
+                index += 1
+            counts[index] += 1
+        bounds = BUCKETS_MS + [math.inf]
+        used = [i for i, count in enumerate(counts) if count]
+        if not used:
+            return []
+        return list(zip(bounds[used[0]:used[-1] + 1], counts[used[0]:used[-1] + 1]))
+
+    def report(self):
+        lines = []
+        for name in self.names():
+            stats = self.stats(name)
+            lines.append(
+                f"{name}: {stats['count']} calls, mean {stats['mean']:.2f} ms, p50 {stats['p50']:.2f} ms, "
+                f"p90 {stats['p90']:.2f} ms, p99 {stats['p99']:.2f} ms, max {stats['max']:.2f} ms"
+            )
+            histogram = self.histogram(name)
+            most = max(count for _, count in histogram)
+            for bound, count in histogram:
+                label = f"<= {bound:g} ms" if bound != math.inf else f"> {BUCKETS_MS[-1]:g} ms"
+                lines.append(f"  {label:>14} {count:>7} {'#' * max(1, round(count / most * BAR_WIDTH))}")
+        return "\n".join(lines) if lines else "No timings recorded."
+
+
+# shared by the GUI, the library and the command line. RECIPEPY_PROFILE=1
+# turns it on from the start, e.g. to time loading a database; 0 or empty don't
+profiler = Profiler(enabled=os.environ.get("RECIPEPY_PROFILE", "").strip().lower() in ("1", "true", "yes", "on"))
@@ -0,0 +1,440 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from ingredients import IngredientCatalog
+
+COOKING_TIME_BUCKET = 15
+
+# placeholder for rows that exist in the attached storage but were not read yet
+_NOT_LOADED = object()
+
+
+def parse_cooking_time(value):
+    # minutes as a non-negative int, None when the input isn't a number
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    value = str(value).strip()
+    # isdigit() would let through '²', which int() rejects
+    return int(value) if value.isdecimal() else None
+
+
+class RecipeRecord:
+    # __slots__ drops the per-instance __dict__. Cooking time is stored as an int
+    # and origins are interned, a library only has a handful of distinct ones.
+    __slots__ = ("recipe_id", "name", "_cooking_time", "_origin", "description", "ingredients", "image_path")
+
+    def __init__(self, recipe_id, name, cooking_time, origin, description, ingredients=None, image_path=''):
+        self.recipe_id = recipe_id
+        self.name = name
+        self.cooking_time = cooking_time
+        self.origin = origin
+        self.description = description
+        self.ingredients = ingredients if ingredients else []
+        self.image_path = image_path
+
+    @property
+    def cooking_time(self):
+        return self._cooking_time
+
+    @cooking_time.setter
+    def cooking_time(self, value):
+        self._cooking_time = parse_cooking_time(value)
+
+    @property
+    def origin(self):
+        return self._origin
+
+    @origin.setter
+    def origin(self, value):
+        self._origin = sys.intern(value) if isinstance(value, str) else value
+
+    def copy(self, recipe_id):
+        # fields are already parsed and interned, so the setters are skipped
+        record = RecipeRecord.__new__(RecipeRecord)
+        record.recipe_id = recipe_id
+        record.name = self.name
+        record._cooking_time = self._cooking_time
+        record._origin = self._origin
+        record.description = self.description
+        record.ingredients = list(self.ingredients)
+        record.image_path = self.image_path
+        return record
+
+    def is_valid(self):
+        if not self.name or self.cooking_time is None or not self.origin or not self.description:
+            return False
+        return True
+
+
+def cooking_time_bucket(cooking_time):
+    if cooking_time is None:
+        return None
+    return cooking_time // COOKING_TIME_BUCKET
+
+
+# sort key per view column, ties are broken by recipe id
+SORT_KEYS = {
+    "id": lambda record: record.recipe_id,
+    "name": lambda record: (record.name or '').casefold(),
+    "cooking_time": lambda record: -1 if record.cooking_time is None else record.cooking_time,
+    "origin": lambda record: (record.origin or '').casefold(),
+}
+
+
+class SortedColumn:
+    # (key, recipe_id) pairs kept in order with bisect, so sorting the view
+    # by this column is a read instead of a sort
+    def __init__(self, key, records=()):
+        self.key = key
+        self._entries = sorted((key(record), record.recipe_id) for record in records)
+        self._ids = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, record):
+        insort(self._entries, (self.key(record), record.recipe_id))
+        self._ids = None
+
+    def remove(self, record):
+        entry = (self.key(record), record.recipe_id)
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
+            self._ids = None
+
+    def ids(self):
+        if self._ids is None:
+            self._ids = [recipe_id for _, recipe_id in self._entries]
+        return self._ids
+
+    def ids_between(self, low, high):
+        first = bisect_left(self._entries, (low,))
+        last = bisect_right(self._entries, (high, float("inf")))
+        return [recipe_id for _, recipe_id in self._entries[first:last]]
+
+
+class RecipeColumns:
+    # Column-per-field backing for bulk work over large collections: numeric
+    # fields live in typed arrays and origins are stored as small codes.
+    def __init__(self, records=()):
+        self.recipe_ids = array("q")
+        self.cooking_times = array("l")
+        self.origin_codes = array("H")
+        self.origins = []
+        self._origin_codes = {}
+        self.names = []
+        self.descriptions = []
+        self.ingredients = []
+        self.image_paths = []
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.record(row)
+
+    def append(self, record):
+        code = self._origin_codes.get(record.origin)
+        if code is None:
+            code = self._origin_codes[record.origin] = len(self.origins)
+            self.origins.append(record.origin)
+        self.recipe_ids.append(record.recipe_id)
+        # -1 marks a missing cooking time in the int column
+        self.cooking_times.append(-1 if record.cooking_time is None else record.cooking_time)
+        self.origin_codes.append(code)
+        self.names.append(record.name)
+        self.descriptions.append(record.description)
+        self.ingredients.append(tuple(record.ingredients))
+        self.image_paths.append(record.image_path or '')
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def record(self, row):
+        cooking_time = self.cooking_times[row]
+        return RecipeRecord(
+            self.recipe_ids[row],
+            self.names[row],
+            None if cooking_time < 0 else cooking_time,
+            self.origins[self.origin_codes[row]],
+            self.descriptions[row],
+            ingredients=list(self.ingredients[row]),
+            image_path=self.image_paths[row],
+        )
+
+    def ids_with_cooking_time(self, low, high):
+        return [recipe_id for recipe_id, minutes in zip(self.recipe_ids, self.cooking_times) if low <= minutes <= high]
+
+    def origin_counts(self):
+        counts = [0] * len(self.origins)
+        for code in self.origin_codes:
+            counts[code] += 1
+        return dict(zip(self.origins, counts))
+
+
+class RecipeStore:
+    def __init__(self, records=(), catalog=None):
+        # recipe_id -> record, dict keeps insertion order for the view
+        self._records = {}
+        self._by_origin = {}
+        self._by_time_bucket = {}
+        self._by_ingredient = {}
+        # recipe_id -> bitmask of catalog ingredient ids
+        self._ingredient_masks = {}
+        # column name -> SortedColumn, built the first time a column is sorted
+        self._sorted = {}
+        self.catalog = catalog if catalog is not None else IngredientCatalog()
+        # ids are handed out in increasing order and never reused, even after
+        # deletes, so undo and the journal can always put a record back
+        self._next_id = 1
+        self._unloaded = 0
+        self.storage = None
+        for record in records:
+            self.add(record)
+
+    def attach(self, storage):
+        # Only ids are read up front, records are loaded from storage on first access
+        self.detach()
+        for recipe_id in storage.ids():
+            self._records[recipe_id] = _NOT_LOADED
+        self._next_id = max(storage.load_next_id(), max(self._records, default=0) + 1)
+        self._unloaded = len(self._records)
+        self.storage = storage
+
+    def detach(self):
+        self.storage = None
+        self._next_id = 1
+        self._reset()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        self._load_all()
+        return iter(self._records.values())
+
+    def snapshot(self):
+        # Every record as it is now, for a worker thread such as an export.
+        # Unloaded rows are streamed from storage instead of loaded here, the
+        # rest are copies so edits made meanwhile can't show up half applied.
+        if self.storage is None:
+            return [record.copy(record.recipe_id) for record in self._records.values()]
+        return self.storage.snapshot()
+
+    def rows(self):
+        # Every record without loading it into the store: the store's own
+        # object once loaded, else a row read from storage that is dropped
+        # after use. Evaluated lazily, a consumer that pauses between items
+        # sees the store as it is when it resumes.
+        if self.storage is None or not self._unloaded:
+            yield from list(self._records.values())
+            return
+        for record in self.storage.snapshot():
+            current = self._records.get(record.recipe_id)
+            if current is _NOT_LOADED:
+                yield record
+            elif current is not None:
+                yield current
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self._records
+
+    def get(self, recipe_id, default=None):
+        record = self._records.get(recipe_id, default)
+        if record is _NOT_LOADED:
+            record = self._load(recipe_id)
+        return record
+
+    def get_many(self, recipe_ids):
+        # unloaded records are read from storage in one query instead of one each
+        recipe_ids = list(recipe_ids)
+        missing = [i for i in recipe_ids if self._records.get(i) is _NOT_LOADED]
+        if missing:
+            for record in self.storage.fetch_many(missing):
+                self._records[record.recipe_id] = record
+                self._unloaded -= 1
+                self._index(record)
+        return [self._records[i] for i in recipe_ids if i in self._records]
+
+    def ids(self):
+        return self._records.keys()
+
+    def next_id(self):
+        # the id the next added record gets, without reserving it
+        return self._next_id
+
+    def allocate_ids(self, count):
+        first = self._next_id
+        self._next_id += count
+        return range(first, first + count)
+
+    def add(self, record):
+        if record.recipe_id in self._records:
+            raise KeyError(f"Duplicate recipe id: {record.recipe_id}")
+        self._records[record.recipe_id] = record
+        if record.recipe_id >= self._next_id:
+            self._next_id = record.recipe_id + 1
+        self._index(record)
+        if self.storage is not None:
+            self.storage.write(record)
+        return record
+
+    def add_many(self, records):
+        # records without an id, or whose id is taken, get the next free one
+        added = []
+        for record in records:
+            if record.recipe_id is None or record.recipe_id in self._records:
+                record.recipe_id = self.next_id()
+            added.append(self.add(record))
+        return added
+
+    def remove(self, recipe_id):
+        record = self._records.pop(recipe_id, None)
+        if record is _NOT_LOADED:
+            self._unloaded -= 1
+            record = None
+        elif record is not None:
+            self._unindex(record)
+        if self.storage is not None:
+            self.storage.delete(recipe_id)
+        return record
+
+    def update(self, record, **fields):
+        # record must be the one this store holds, not a removed or stale copy
+        if self._records.get(record.recipe_id) is not record:
+            raise KeyError(f"Unknown recipe: {record.recipe_id}")
+        self._unindex(record)
+        for field, value in fields.items():
+            setattr(record, field, value)
+        self._index(record)
+        if self.storage is not None:
+            self.storage.write(record)
+        return record
+
+    def clear(self):
+        self._reset()
+        if self.storage is not None:
+            self.storage.clear()
+
+    def by_origin(self, origin):
+        self._load_all()
+        return [self._records[i] for i in self._by_origin.get(origin, ())]
+
+    def by_ingredient(self, ingredient):
+        self._load_all()
+        return [self._records[i] for i in self._by_ingredient.get(ingredient, ())]
+
+    def by_cooking_time(self, low, high):
+        self._load_all()
+        found = []
+        first, last = low // COOKING_TIME_BUCKET, high // COOKING_TIME_BUCKET
+        for bucket in range(first, last + 1):
+            for recipe_id in self._by_time_bucket.get(bucket, ()):
+                record = self._records[recipe_id]
+                # edge buckets may hold times just outside the range
+                if low <= record.cooking_time <= high:
+                    found.append(record)
+        return found
+
+    def sorted_ids(self, column, descending=False):
+        ids = self._sorted_column(column).ids()
+        return ids[::-1] if descending else ids
+
+    def ids_with_cooking_time(self, low, high):
+        return self._sorted_column("cooking_time").ids_between(low, high)
+
+    def ids_with_origin(self, origin):
+        self._load_all()
+        return set(self._by_origin.get(origin, ()))
+
+    def origins(self):
+        self._load_all()
+        return sorted(origin for origin in self._by_origin if origin)
+
+    def ids_with_ingredients(self, include=(), exclude=()):
+        # Set algebra over the ingredient indexes, returns recipe ids
+        self._load_all()
+        exclude_mask = self.catalog.mask(exclude)
+        if include:
+            postings = sorted((self._by_ingredient.get(name, set()) for name in include), key=len)
+            ids = postings[0].intersection(*postings[1:])
+        else:
+            ids = self._records.keys()
+        masks = self._ingredient_masks
+        return {recipe_id for recipe_id in ids if not masks.get(recipe_id, 0) & exclude_mask}
+
+    def ids_makeable_with(self, available):
+        # recipes whose ingredients are all among the available ones
+        self._load_all()
+        missing = ~self.catalog.mask(available)
+        return {recipe_id for recipe_id, mask in self._ingredient_masks.items() if not mask & missing}
+
+    def _reset(self):
+        self._records.clear()
+        self._by_origin.clear()
+        self._by_time_bucket.clear()
+        self._by_ingredient.clear()
+        self._ingredient_masks.clear()
+        self._sorted.clear()
+        self._unloaded = 0
+
+    def _sorted_column(self, column):
+        index = self._sorted.get(column)
+        if index is None:
+            # sorting needs every key, so a lazily opened store is read in full once
+            self._load_all()
+            index = self._sorted[column] = SortedColumn(SORT_KEYS[column], self._records.values())
+        return index
+
+    def _load(self, recipe_id):
+        record = self.storage.fetch(recipe_id)
+        self._records[recipe_id] = record
+        self._unloaded -= 1
+        self._index(record)
+        return record
+
+    def _load_all(self):
+        if not self._unloaded:
+            return
+        for record in self.storage.iter_records():
+            if self._records.get(record.recipe_id) is _NOT_LOADED:
+                self._records[record.recipe_id] = record
+                self._index(record)
+        self._unloaded = 0
+
+    def _index(self, record):
+        recipe_id = record.recipe_id
+        self._by_origin.setdefault(record.origin, set()).add(recipe_id)
+        bucket = cooking_time_bucket(record.cooking_time)
+        if bucket is not None:
+            self._by_time_bucket.setdefault(bucket, set()).add(recipe_id)
+        if record.ingredients:
+            record.ingredients = self.catalog.intern(record.ingredients)
+            self._ingredient_masks[recipe_id] = self.catalog.mask(record.ingredients)
+        for ingredient in record.ingredients:
+            self._by_ingredient.setdefault(ingredient, set()).add(recipe_id)
+        for index in self._sorted.values():
+            index.add(record)
+
+    def _unindex(self, record):
+        recipe_id = record.recipe_id
+        self._discard(self._by_origin, record.origin, recipe_id)
+        self._discard(self._by_time_bucket, cooking_time_bucket(record.cooking_time), recipe_id)
+        self._ingredient_masks.pop(recipe_id, None)
+        for ingredient in record.ingredients:
+            self._discard(self._by_ingredient, ingredient, recipe_id)
+        for index in self._sorted.values():
+            index.remove(record)
+
+    @staticmethod
+    def _discard(index, key, recipe_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(recipe_id)
+            if not ids:
+                del index[key]
@@ -0,0 +1,130 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# matches in the name count more than matches in the description
+FIELD_WEIGHTS = (("name", 3.0), ("origin", 2.0), ("ingredients", 2.0), ("description", 1.0))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def record_terms(record):
+    terms = {}
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(record, field)
+        text = " ".join(value) if isinstance(value, (list, tuple)) else str(value or '')
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+class SearchIndex:
+    # Inverted index token -> {recipe_id: weight}, plus a sorted vocabulary so
+    # the last word of a query can be matched as a prefix while typing.
+    def __init__(self, records=()):
+        self._postings = {}
+        self._documents = {}
+        self._vocabulary = []
+        self.stale = False
+        self.rebuild(records)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def rebuild(self, records):
+        self.clear()
+        for record in records:
+            self.add(record)
+        self.stale = False
+
+    def clear(self):
+        self._postings.clear()
+        self._documents.clear()
+        self._vocabulary = []
+
+    def add(self, record):
+        recipe_id = record.recipe_id
+        if recipe_id in self._documents:
+            self.remove(recipe_id)
+        terms = record_terms(record)
+        self._documents[recipe_id] = tuple(terms)
+        for token, weight in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            postings[recipe_id] = weight
+
+    def copy(self, source_id, record):
+        # record has the same terms as source_id, reuse its weights
+        terms = self._documents.get(source_id)
+        if terms is None:
+            self.add(record)
+            return
+        recipe_id = record.recipe_id
+        self._documents[recipe_id] = terms
+        for token in terms:
+            postings = self._postings[token]
+            postings[recipe_id] = postings[source_id]
+
+    def update(self, record):
+        self.add(record)
+
+    def remove(self, recipe_id):
+        for token in self._documents.pop(recipe_id, ()):
+            postings = self._postings[token]
+            del postings[recipe_id]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def search(self, query, limit=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for position, token in enumerate(tokens):
+            prefix = position == len(tokens) - 1
+            matches = self._match(token, prefix, scores)
+            if scores is not None:
+                matches = {recipe_id: scores[recipe_id] + score for recipe_id, score in matches.items()}
+            scores = matches
+            if not scores:
+                return []
+        if limit is None:
+            return sorted(scores, key=scores.__getitem__, reverse=True)
+        return heapq.nlargest(limit, scores, key=scores.__getitem__)
+
+    def _match(self, token, prefix, candidates=None):
+        words = self._prefixed(token) if prefix else ([token] if token in self._postings else [])
+        total = len(self._documents)
+        matches = {}
+        for word in words:
+            postings = self._postings[word]
+            # exact words rank above words that only share the prefix
+            factor = math.log(1 + total / len(postings)) * (1.0 if word == token else 0.5)
+            if candidates is not None and len(candidates) < len(postings):
+                # later query words only need to score recipes still in the running
+                hits = ((recipe_id, postings[recipe_id]) for recipe_id in candidates if recipe_id in postings)
+            else:
+                hits = postings.items()
+            for recipe_id, weight in hits:
+                if candidates is not None and recipe_id not in candidates:
+                    continue
+                score = weight * factor
+                if score > matches.get(recipe_id, 0.0):
+                    matches[recipe_id] = score
+        return matches
+
+    def _prefixed(self, prefix):
+        vocabulary = self._vocabulary
+        index = bisect_left(vocabulary, prefix)
+        words = []
+        while index < len(vocabulary) and vocabulary[index].startswith(prefix):
+            words.append(vocabulary[index])
+            index += 1
+        return words
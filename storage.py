@@ -0,0 +1,208 @@
+import sqlite3
+
+from records import RecipeRecord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    recipe_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    cooking_time INTEGER NOT NULL,
+    origin TEXT NOT NULL,
+    description TEXT NOT NULL,
+    image_path TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS recipes_name ON recipes (name);
+CREATE INDEX IF NOT EXISTS recipes_origin ON recipes (origin);
+CREATE TABLE IF NOT EXISTS ingredients (
+    ingredient_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS recipe_ingredients (
+    recipe_id INTEGER NOT NULL,
+    ingredient_id INTEGER NOT NULL,
+    PRIMARY KEY (recipe_id, ingredient_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recipe_ingredients_ingredient ON recipe_ingredients (ingredient_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+RECIPE_COLUMNS = "r.recipe_id, r.name, r.cooking_time, r.origin, r.description, r.image_path"
+# unit separator, never typed into an ingredient name
+INGREDIENT_SEPARATOR = "\x1f"
+
+
+class SqliteStorage:
+    # Pending writes are kept per recipe_id and written in one transaction on
+    # flush(), so saving costs the number of edited rows, not the library size.
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        try:
+            self.connection.executescript(SCHEMA)
+        except sqlite3.DatabaseError:
+            # e.g. "file is not a database", nothing should keep the file open
+            self.connection.close()
+            raise
+        self._pending = {}
+        self._cleared = False
+        self._ingredient_ids = None
+
+    @property
+    def dirty(self):
+        return self._cleared or bool(self._pending)
+
+    def close(self):
+        self.connection.close()
+
+    def ids(self):
+        cursor = self.connection.execute("SELECT recipe_id FROM recipes ORDER BY recipe_id")
+        return [row[0] for row in cursor]
+
+    def fetch(self, recipe_id):
+        row = self.connection.execute(
+            f"SELECT {RECIPE_COLUMNS}, group_concat(i.name, ?) FROM recipes r "
+            "LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.recipe_id "
+            "LEFT JOIN ingredients i ON i.ingredient_id = ri.ingredient_id "
+            "WHERE r.recipe_id = ? GROUP BY r.recipe_id",
+            (INGREDIENT_SEPARATOR, recipe_id),
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def fetch_many(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        records = []
+        # stay under SQLite's default limit of 999 bound parameters
+        for start in range(0, len(recipe_ids), 900):
+            chunk = recipe_ids[start:start + 900]
+            cursor = self.connection.execute(
+                f"SELECT {RECIPE_COLUMNS}, group_concat(i.name, ?) FROM recipes r "
+                "LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.recipe_id "
+                "LEFT JOIN ingredients i ON i.ingredient_id = ri.ingredient_id "
+                f"WHERE r.recipe_id IN ({', '.join('?' * len(chunk))}) GROUP BY r.recipe_id",
+                (INGREDIENT_SEPARATOR, *chunk),
+            )
+            records.extend(self._record(row) for row in cursor)
+        return records
+
+    def iter_records(self, chunk_size=1000):
+        cursor = self.connection.execute(
+            f"SELECT {RECIPE_COLUMNS}, group_concat(i.name, ?) FROM recipes r "
+            "LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.recipe_id "
+            "LEFT JOIN ingredients i ON i.ingredient_id = ri.ingredient_id "
+            "GROUP BY r.recipe_id ORDER BY r.recipe_id",
+            (INGREDIENT_SEPARATOR,),
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._record(row)
+
+    def snapshot(self, chunk_size=1000):
+        # The records as they are right now, saved rows merged with pending
+        # changes, as a generator that may be consumed on another thread.
+        # It reads through its own connection one chunk per query, so no lock
+        # is held between chunks that would block a save meanwhile. Pending
+        # records are copied, later edits on the caller's thread don't show.
+        pending = {recipe_id: record and record.copy(recipe_id) for recipe_id, record in self._pending.items()}
+        return self._snapshot(pending, self._cleared, chunk_size)
+
+    def _snapshot(self, pending, cleared, chunk_size):
+        if not cleared:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            try:
+                last_id = None
+                while True:
+                    rows = connection.execute(
+                        f"SELECT {RECIPE_COLUMNS}, group_concat(i.name, ?) FROM recipes r "
+                        "LEFT JOIN recipe_ingredients ri ON ri.recipe_id = r.recipe_id "
+                        "LEFT JOIN ingredients i ON i.ingredient_id = ri.ingredient_id "
+                        "WHERE ? IS NULL OR r.recipe_id > ? GROUP BY r.recipe_id ORDER BY r.recipe_id LIMIT ?",
+                        (INGREDIENT_SEPARATOR, last_id, last_id, chunk_size),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    for row in rows:
+                        if row[0] not in pending:
+                            yield self._record(row)
+            finally:
+                connection.close()
+        for record in pending.values():
+            if record is not None:
+                yield record
+
+    def load_ingredients(self):
+        cursor = self.connection.execute("SELECT name FROM ingredients ORDER BY ingredient_id")
+        return [row[0] for row in cursor]
+
+    def save_ingredients(self, names):
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO ingredients (name) VALUES (?)", ((name,) for name in names))
+        self._ingredient_ids = None
+
+    def load_next_id(self):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'next_recipe_id'").fetchone()
+        return row[0] if row else 1
+
+    def save_next_id(self, next_id):
+        # keeps ids of deleted recipes from being handed out again after reopening
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('next_recipe_id', ?)", (next_id,))
+
+    def write(self, record):
+        self._pending[record.recipe_id] = record
+
+    def delete(self, recipe_id):
+        self._pending[recipe_id] = None
+
+    def clear(self):
+        self._pending.clear()
+        self._cleared = True
+
+    def flush(self):
+        if not self.dirty:
+            return
+        written = [record for record in self._pending.values() if record is not None]
+        touched = [(recipe_id,) for recipe_id in self._pending]
+        with self.connection:
+            if self._cleared:
+                self.connection.execute("DELETE FROM recipe_ingredients")
+                self.connection.execute("DELETE FROM recipes")
+            self.connection.executemany("DELETE FROM recipe_ingredients WHERE recipe_id = ?", touched)
+            self.connection.executemany("DELETE FROM recipes WHERE recipe_id = ?", touched)
+            self.connection.executemany(
+                "INSERT INTO recipes VALUES (?, ?, ?, ?, ?, ?)",
+                ((r.recipe_id, r.name, r.cooking_time, r.origin, r.description, r.image_path or '') for r in written),
+            )
+            links = [(record.recipe_id, ingredient) for record in written for ingredient in record.ingredients]
+            if links:
+                ingredient_ids = self._lookup_ingredients({ingredient for _, ingredient in links})
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO recipe_ingredients VALUES (?, ?)",
+                    ((recipe_id, ingredient_ids[ingredient]) for recipe_id, ingredient in links),
+                )
+        self._pending.clear()
+        self._cleared = False
+
+    def _lookup_ingredients(self, names):
+        if self._ingredient_ids is None:
+            self._ingredient_ids = dict(self.connection.execute("SELECT name, ingredient_id FROM ingredients"))
+        missing = [(name,) for name in names if name not in self._ingredient_ids]
+        if missing:
+            self.connection.executemany("INSERT OR IGNORE INTO ingredients (name) VALUES (?)", missing)
+            self._ingredient_ids = dict(self.connection.execute("SELECT name, ingredient_id FROM ingredients"))
+        return self._ingredient_ids
+
+    @staticmethod
+    def _record(row):
+        recipe_id, name, cooking_time, origin, description, image_path, ingredients = row
+        return RecipeRecord(
+            recipe_id, name, cooking_time, origin, description,
+            ingredients=ingredients.split(INGREDIENT_SEPARATOR) if ingredients else None,
+            image_path=image_path,
+        )
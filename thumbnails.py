@@ -0,0 +1,200 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+THUMBNAIL_SIZE = (250, 250)
+POLL_INTERVAL_MS = 30
+
+
+def default_cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "RecipePy", "thumbnails")
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    image = Image.open(path)
+    # JPEGs can be decoded straight at 1/2, 1/4 or 1/8 scale
+    image.draft("RGB", size)
+    # reduce() and LANCZOS don't take palette, bilevel or CMYK images
+    if image.mode not in ("RGB", "RGBA"):
+        transparent = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+    factor = min(image.width // size[0], image.height // size[1])
+    if factor >= 2:
+        image = image.reduce(factor)
+    image = image.resize(size, Image.Resampling.LANCZOS)
+    image.load()
+    return image
+
+
+class ThumbnailDiskCache:
+    # Pre-scaled thumbnails stored as PNG files named by a hash of the source
+    # path, size and mtime, so an edited image gets a new entry. The oldest
+    # entries are evicted once the directory grows past max_bytes.
+    def __init__(self, directory=None, size=THUMBNAIL_SIZE, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.size = size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, path):
+        stat = os.stat(path)
+        source = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{self.size[0]}x{self.size[1]}"
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    def load(self, path):
+        cached = os.path.join(self.directory, self.key(path) + ".png")
+        try:
+            image = Image.open(cached)
+            image.load()
+        except (OSError, ValueError):
+            image = decode_thumbnail(path, self.size)
+            # a failed cache write only costs decoding again next time
+            try:
+                self._save(cached, image)
+            except (OSError, ValueError) as e:
+                print(f"Error caching thumbnail: {e}")
+            return image
+        # keep recently used entries at the young end for eviction, which
+        # may just have removed this one on another thread
+        try:
+            os.utime(cached)
+        except OSError:
+            pass
+        return image
+
+    def warm(self, path):
+        cached = os.path.join(self.directory, self.key(path) + ".png")
+        if not os.path.exists(cached):
+            self._save(cached, decode_thumbnail(path, self.size))
+
+    def _save(self, cached, image):
+        # PNG has no CMYK or YCbCr modes
+        if image.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                image.save(file, "PNG")
+            os.replace(temporary, cached)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(cached)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".png")]
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        # trim to 90% so eviction doesn't run again on the next save
+        target = self.max_bytes * 0.9
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                continue
+            total -= size
+        self._total_bytes = total
+
+
+class ThumbnailService:
+    # Decodes images on worker threads and hands them back to Tk with after().
+    # PhotoImages are kept in an LRU bounded by their pixel memory.
+    def __init__(self, root, size=THUMBNAIL_SIZE, max_bytes=64 * 1024 * 1024, workers=2, disk_cache=None):
+        self.root = root
+        self.size = size
+        self.disk_cache = disk_cache
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._waiting = {}
+        self._results = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        # warm-up gets its own worker so it never delays an open details window
+        self._warm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnail-warm")
+        self._polling = False
+
+    def request(self, path, callback):
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError as e:
+            print(f"Error loading image: {e}")
+            return
+        photo = self._cache.get(key)
+        if photo is not None:
+            self._cache.move_to_end(key)
+            callback(photo)
+            return
+        if key in self._waiting:
+            self._waiting[key].append(callback)
+            return
+        self._waiting[key] = [callback]
+        if self.disk_cache is not None:
+            future = self._executor.submit(self.disk_cache.load, path)
+        else:
+            future = self._executor.submit(decode_thumbnail, path, self.size)
+        future.add_done_callback(lambda future: self._results.put((key, future)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def warm_up(self, paths):
+        if self.disk_cache is not None:
+            self._warm_executor.submit(self._warm, list(paths))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._warm_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _warm(self, paths):
+        for path in paths:
+            try:
+                self.disk_cache.warm(path)
+            except Exception as e:
+                print(f"Error loading image: {e}")
+
+    def _poll(self):
+        while True:
+            try:
+                key, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            callbacks = self._waiting.pop(key, [])
+            try:
+                photo = ImageTk.PhotoImage(future.result())
+            except Exception as e:
+                print(f"Error loading image: {e}")
+                continue
+            self._store(key, photo)
+            for callback in callbacks:
+                callback(photo)
+        if self._waiting:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _store(self, key, photo):
+        self._cache[key] = photo
+        self._cache_bytes += photo.width() * photo.height() * 4
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cache_bytes -= old.width() * old.height() * 4
@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+import queue
+import threading
+
+from records import RecipeRecord
+
+FIELDS = ("recipe_id", "name", "cooking_time", "origin", "description", "ingredients", "image_path")
+FILETYPES = (("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("all files", "*.*"))
+CSV_INGREDIENT_SEPARATOR = ";"
+BATCH_SIZE = 1000
+
+
+def file_format(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def record_to_dict(record):
+    return {
+        "recipe_id": record.recipe_id,
+        "name": record.name,
+        "cooking_time": record.cooking_time,
+        "origin": record.origin,
+        "description": record.description,
+        "ingredients": list(record.ingredients),
+        "image_path": record.image_path or '',
+    }
+
+
+def record_from_dict(row):
+    recipe_id = row.get("recipe_id")
+    ingredients = row.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = [i for i in ingredients.split(CSV_INGREDIENT_SEPARATOR) if i]
+    return RecipeRecord(
+        int(recipe_id) if recipe_id not in (None, '') else None,
+        row.get("name", ''),
+        row.get("cooking_time", ''),
+        row.get("origin", ''),
+        row.get("description", ''),
+        ingredients=ingredients,
+        image_path=row.get("image_path") or '',
+    )
+
+
+def read_records(path, batch_size=BATCH_SIZE):
+    # Yields (batch, fraction_done) so memory stays bounded by the batch size
+    total = os.path.getsize(path) or 1
+    with open(path, newline='', encoding="utf-8") as handle:
+        if file_format(path) == "csv":
+            rows = csv.DictReader(handle)
+        else:
+            rows = (json.loads(line) for line in handle if line.strip())
+        batch = []
+        for row in rows:
+            batch.append(record_from_dict(row))
+            if len(batch) >= batch_size:
+                yield batch, handle.buffer.tell() / total
+                batch = []
+        if batch:
+            yield batch, 1.0
+
+
+def write_records(path, records, total, batch_size=BATCH_SIZE):
+    # Yields the fraction written after every batch
+    as_csv = file_format(path) == "csv"
+    with open(path, "w", newline='', encoding="utf-8") as handle:
+        if as_csv:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+        for done, record in enumerate(records, 1):
+            row = record_to_dict(record)
+            if as_csv:
+                row["ingredients"] = CSV_INGREDIENT_SEPARATOR.join(row["ingredients"])
+                writer.writerow(row)
+            else:
+                handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if done % batch_size == 0:
+                yield done / max(total, 1)
+    yield 1.0
+
+
+def read_ingredients(path, batch_size=BATCH_SIZE):
+    # One ingredient per line, or the first column of a CSV file
+    total = os.path.getsize(path) or 1
+    with open(path, newline='', encoding="utf-8") as handle:
+        if file_format(path) == "csv":
+            names = (row[0] for row in csv.reader(handle) if row)
+        else:
+            names = (line for line in handle)
+        batch = []
+        for name in names:
+            name = name.strip()
+            if name:
+                batch.append(name)
+            if len(batch) >= batch_size:
+                yield batch, handle.buffer.tell() / total
+                batch = []
+        if batch:
+            yield batch, 1.0
+
+
+def write_ingredients(path, names, total, batch_size=BATCH_SIZE):
+    # One ingredient per line, or a one-column CSV file, the shapes
+    # read_ingredients() takes. Yields the fraction written after every batch.
+    with open(path, "w", newline='', encoding="utf-8") as handle:
+        writer = csv.writer(handle) if file_format(path) == "csv" else None
+        for done, name in enumerate(names, 1):
+            if writer is not None:
+                writer.writerow([name])
+            else:
+                handle.write(name + "\n")
+            if done % batch_size == 0:
+                yield done / max(total, 1)
+    yield 1.0
+
+
+class BackgroundTask:
+    # Runs a generator on a worker thread. Items go through a bounded queue,
+    # so the worker waits for the Tk thread instead of reading ahead unbounded.
+    def __init__(self, generator, max_pending=8):
+        self.generator = generator
+        self.items = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.finished = False
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def poll(self, limit=4):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.items.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    @property
+    def done(self):
+        return self.finished and self.items.empty()
+
+    def _run(self):
+        try:
+            for item in self.generator:
+                while not self.cancelled.is_set():
+                    try:
+                        self.items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self.cancelled.is_set():
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
@@ -0,0 +1,249 @@
+def record_values(record):
+    return (record.recipe_id, record.name, record.cooking_time, record.origin)
+
+
+class TreeviewSync:
+    # Keeps a Treeview in step with the record store using recipe_id as iid,
+    # so an edit only touches the rows that actually changed.
+    def __init__(self, treeview, values=record_values):
+        self.treeview = treeview
+        self.values = values
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def upsert(self, record):
+        iid = str(record.recipe_id)
+        values = self.values(record)
+        current = self._rows.get(iid)
+        if current is None:
+            self.treeview.insert("", "end", iid=iid, values=values)
+        elif current != values:
+            self.treeview.item(iid, values=values)
+        self._rows[iid] = values
+
+    def upsert_many(self, records):
+        for record in records:
+            self.upsert(record)
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.treeview.selection()]
+
+    def select_all(self):
+        self.treeview.selection_set(list(self._rows))
+
+    def select_none(self):
+        self.treeview.selection_set([])
+
+    def remove(self, recipe_id):
+        iid = str(recipe_id)
+        if self._rows.pop(iid, None) is not None:
+            self.treeview.delete(iid)
+
+    def remove_many(self, recipe_ids):
+        # one Tk call for the whole batch
+        iids = [iid for iid in map(str, recipe_ids) if self._rows.pop(iid, None) is not None]
+        if iids:
+            self.treeview.delete(*iids)
+
+    def clear(self):
+        if self._rows:
+            self.treeview.delete(*self._rows)
+        self._rows.clear()
+
+    def sync(self, records):
+        order = []
+        for record in records:
+            order.append(str(record.recipe_id))
+            self.upsert(record)
+        seen = set(order)
+        stale = [iid for iid in self._rows if iid not in seen]
+        if stale:
+            self.treeview.delete(*stale)
+            for iid in stale:
+                del self._rows[iid]
+        # ranked results may reorder rows, one Tk call puts them in place
+        if tuple(order) != self.treeview.get_children():
+            self.treeview.set_children("", *order)
+
+
+class VirtualTreeview:
+    # Same interface as TreeviewSync, but only the rows in the visible window
+    # exist as Tk items. Records are fetched in one fetch_many(ids) call as the
+    # window moves and kept in a small overscan cache around it. The selection is kept as a set of
+    # ids, so rows selected off screen stay selected.
+    def __init__(self, treeview, scrollbar, fetch_many, values=record_values, overscan=50):
+        self.treeview = treeview
+        self.scrollbar = scrollbar
+        self.fetch_many = fetch_many
+        self.values = values
+        self.overscan = overscan
+        self._ids = []
+        self._members = set()
+        self._offset = 0
+        self._cache = {}
+        self._shown = []
+        self._selected = set()
+        self.scrollbar.config(command=self.yview)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.treeview.bind(sequence, self._on_wheel)
+        self.treeview.bind("<ButtonPress-1>", self._on_press)
+        self.treeview.bind("<<TreeviewSelect>>", self._on_select)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def height(self):
+        return int(self.treeview.cget("height"))
+
+    def detach(self):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<ButtonPress-1>", "<<TreeviewSelect>>"):
+            self.treeview.unbind(sequence)
+        self.clear()
+
+    def upsert(self, record):
+        recipe_id = record.recipe_id
+        if recipe_id in self._members:
+            if recipe_id in self._cache:
+                self._cache[recipe_id] = self.values(record)
+        else:
+            self._ids.append(recipe_id)
+            self._members.add(recipe_id)
+        if self._offset <= len(self._ids) - 1 < self._offset + self.height or str(recipe_id) in self._shown:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def upsert_many(self, records):
+        # one render for the whole batch
+        for record in records:
+            recipe_id = record.recipe_id
+            if recipe_id in self._members:
+                self._cache.pop(recipe_id, None)
+            else:
+                self._ids.append(recipe_id)
+                self._members.add(recipe_id)
+        self._render()
+
+    def selected_ids(self):
+        return [recipe_id for recipe_id in self._ids if recipe_id in self._selected]
+
+    def select_all(self):
+        self._selected = set(self._ids)
+        self._render()
+
+    def select_none(self):
+        self._selected = set()
+        self._render()
+
+    def remove(self, recipe_id):
+        if recipe_id not in self._members:
+            return
+        index = self._ids.index(recipe_id)
+        del self._ids[index]
+        self._members.discard(recipe_id)
+        self._selected.discard(recipe_id)
+        self._cache.pop(recipe_id, None)
+        if index < self._offset + self.height:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def remove_many(self, recipe_ids):
+        # One pass over the list however many rows go, remove() would scan
+        # it once per row
+        removed = self._members.intersection(recipe_ids)
+        if not removed:
+            return
+        self._ids = [recipe_id for recipe_id in self._ids if recipe_id not in removed]
+        self._members -= removed
+        self._selected -= removed
+        for recipe_id in removed:
+            self._cache.pop(recipe_id, None)
+        self._render()
+
+    def clear(self):
+        self._ids = []
+        self._members = set()
+        self._selected = set()
+        self._cache.clear()
+        self._offset = 0
+        self._render()
+
+    def sync(self, records):
+        self.sync_ids(record.recipe_id for record in records)
+
+    def sync_ids(self, ids):
+        self._ids = list(ids)
+        self._members = set(self._ids)
+        self._selected &= self._members
+        self._cache.clear()
+        self._render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * len(self._ids))
+        else:
+            step = self.height if args[2] == "pages" else 1
+            offset = self._offset + int(args[1]) * step
+        self.scroll_to(offset)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, len(self._ids) - self.height))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self._offset - 3)
+        else:
+            self.scroll_to(self._offset + 3)
+        return "break"
+
+    def _on_press(self, event):
+        # a plain click on a row starts a new selection, also off screen
+        if self.treeview.identify_region(event.x, event.y) in ("cell", "tree") and not event.state & 0x0005:
+            self._selected = set()
+
+    def _on_select(self, event):
+        # Tk only knows the shown rows, merge their state into the id set
+        selected = set(self.treeview.selection())
+        for iid in self._shown:
+            if iid in selected:
+                self._selected.add(int(iid))
+            else:
+                self._selected.discard(int(iid))
+
+    def _window_values(self):
+        self._offset = max(0, min(self._offset, len(self._ids) - self.height))
+        window = self._ids[self._offset:self._offset + self.height]
+        if any(recipe_id not in self._cache for recipe_id in window):
+            start = max(0, self._offset - self.overscan)
+            stop = self._offset + self.height + self.overscan
+            nearby = self._ids[start:stop]
+            cache = {recipe_id: self._cache[recipe_id] for recipe_id in nearby if recipe_id in self._cache}
+            missing = [recipe_id for recipe_id in nearby if recipe_id not in cache]
+            for record in self.fetch_many(missing):
+                cache[record.recipe_id] = self.values(record)
+            self._cache = cache
+        return [(str(recipe_id), self._cache[recipe_id]) for recipe_id in window if recipe_id in self._cache]
+
+    def _render(self):
+        if self._shown:
+            self.treeview.delete(*self._shown)
+        self._shown = []
+        for iid, values in self._window_values():
+            self.treeview.insert("", "end", iid=iid, values=values)
+            self._shown.append(iid)
+        self.treeview.selection_set([iid for iid in self._shown if int(iid) in self._selected])
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self._ids)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self._offset / total, min(1, (self._offset + self.height) / total))